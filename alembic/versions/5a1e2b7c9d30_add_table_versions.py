@@ -0,0 +1,30 @@
+"""add table_versions
+
+Revision ID: 5a1e2b7c9d30
+Revises: c3c58a511066
+Create Date: 2026-10-18 10:12:41.205117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1e2b7c9d30'
+down_revision: Union[str, None] = 'c3c58a511066'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('table_versions')
@@ -0,0 +1,56 @@
+"""add ratings and rating aggregates
+
+Revision ID: 8f3d6c2a1b47
+Revises: 5a1e2b7c9d30
+Create Date: 2026-10-18 11:02:17.448930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3d6c2a1b47'
+down_revision: Union[str, None] = '5a1e2b7c9d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('groups', sa.Column('rating_sum', sa.Float(), server_default='0', nullable=False))
+    op.add_column('groups', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+    # The old rating was a running pairwise average, not a real mean; carry it
+    # over as a single observation so existing groups keep their ordering.
+    op.execute("""
+        UPDATE groups
+        SET rating_sum = COALESCE(rating, 0),
+            rating_count = CASE WHEN COALESCE(rating, 0) > 0 THEN 1 ELSE 0 END
+    """)
+    op.create_table('ratings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('reservation_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('aggregated', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ),
+    sa.ForeignKeyConstraint(['reservation_id'], ['reservations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('reservation_id')
+    )
+    op.create_index(op.f('ix_ratings_id'), 'ratings', ['id'], unique=False)
+    op.create_index(op.f('ix_ratings_group_id'), 'ratings', ['group_id'], unique=False)
+    op.create_index('ix_ratings_pending', 'ratings', ['group_id'], unique=False, postgresql_where=sa.text('aggregated = false'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ratings_pending', table_name='ratings')
+    op.drop_index(op.f('ix_ratings_group_id'), table_name='ratings')
+    op.drop_index(op.f('ix_ratings_id'), table_name='ratings')
+    op.drop_table('ratings')
+    op.drop_column('groups', 'rating_count')
+    op.drop_column('groups', 'rating_sum')
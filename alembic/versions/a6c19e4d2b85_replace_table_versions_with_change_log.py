@@ -0,0 +1,49 @@
+"""replace table_versions with table_changes
+
+Revision ID: a6c19e4d2b85
+Revises: e4b81f3a6c27
+Create Date: 2026-10-18 16:20:37.418052
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c19e4d2b85'
+down_revision: Union[str, None] = 'e4b81f3a6c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('table_changes',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('weight', sa.BigInteger(), server_default='1', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_table_changes_table_name'), 'table_changes', ['table_name'], unique=False)
+    # Carry the counters over so versions keep increasing and no ETag handed
+    # out before the upgrade can match different data.
+    op.execute("""
+        INSERT INTO table_changes (table_name, weight)
+        SELECT table_name, version FROM table_versions WHERE version > 0
+    """)
+    op.drop_table('table_versions')
+
+
+def downgrade() -> None:
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute("""
+        INSERT INTO table_versions (table_name, version)
+        SELECT table_name, SUM(weight) FROM table_changes GROUP BY table_name
+    """)
+    op.drop_index(op.f('ix_table_changes_table_name'), table_name='table_changes')
+    op.drop_table('table_changes')
@@ -0,0 +1,49 @@
+"""add reservation daily rollups
+
+Revision ID: b2d94e61f0c8
+Revises: 8f3d6c2a1b47
+Create Date: 2026-10-18 12:41:05.217384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d94e61f0c8'
+down_revision: Union[str, None] = '8f3d6c2a1b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('reservation_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('assigned_group_id', sa.Integer(), nullable=False),
+    sa.Column('cleaning_type', sa.String(), nullable=False),
+    sa.Column('priority', sa.String(), nullable=False),
+    sa.Column('approved', sa.Boolean(), nullable=False),
+    sa.Column('reservation_count', sa.BigInteger(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'assigned_group_id', 'cleaning_type', 'priority', 'approved')
+    )
+    op.execute("""
+        INSERT INTO reservation_daily_rollups
+            (day, assigned_group_id, cleaning_type, priority, approved, reservation_count, revenue)
+        SELECT CAST(cleaning_date AS DATE),
+               COALESCE(assigned_group_id, 0),
+               COALESCE(cleaning_type, ''),
+               COALESCE(CAST(priority AS VARCHAR), ''),
+               COALESCE(approved_by_admin, false),
+               COUNT(id),
+               COALESCE(SUM(price), 0)
+        FROM reservations
+        WHERE cleaning_date IS NOT NULL
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('reservation_daily_rollups')
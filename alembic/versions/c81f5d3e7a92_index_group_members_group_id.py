@@ -0,0 +1,26 @@
+"""index group_members group_id
+
+Revision ID: c81f5d3e7a92
+Revises: a6c19e4d2b85
+Create Date: 2026-10-18 16:48:05.912734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5d3e7a92'
+down_revision: Union[str, None] = 'a6c19e4d2b85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_group_members_group_id'), 'group_members', ['group_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_group_members_group_id'), table_name='group_members')
@@ -0,0 +1,53 @@
+"""add task status and group task counters
+
+Revision ID: d7a3c95e2f14
+Revises: b2d94e61f0c8
+Create Date: 2026-10-18 13:27:44.905126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a3c95e2f14'
+down_revision: Union[str, None] = 'b2d94e61f0c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+task_status = sa.Enum('PENDING', 'IN_PROGRESS', 'COMPLETED', name='taskstatus')
+
+
+def upgrade() -> None:
+    task_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('reservations', sa.Column('status', task_status, server_default='PENDING', nullable=False))
+    op.add_column('reservations', sa.Column('notes', sa.String(), nullable=True))
+    op.create_index(
+        'ix_reservations_active_status',
+        'reservations',
+        ['assigned_group_id', 'status'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('PENDING', 'IN_PROGRESS')")
+    )
+    op.create_table('group_task_counters',
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('task_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('group_id', 'status')
+    )
+    op.execute("""
+        INSERT INTO group_task_counters (group_id, status, task_count)
+        SELECT COALESCE(assigned_group_id, 0), CAST(status AS VARCHAR), COUNT(id)
+        FROM reservations
+        GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('group_task_counters')
+    op.drop_index('ix_reservations_active_status', table_name='reservations')
+    op.drop_column('reservations', 'notes')
+    op.drop_column('reservations', 'status')
+    task_status.drop(op.get_bind(), checkfirst=True)
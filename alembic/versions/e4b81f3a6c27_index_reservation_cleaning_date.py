@@ -0,0 +1,26 @@
+"""index reservation cleaning date
+
+Revision ID: e4b81f3a6c27
+Revises: d7a3c95e2f14
+Create Date: 2026-10-18 14:05:12.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b81f3a6c27'
+down_revision: Union[str, None] = 'd7a3c95e2f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_reservations_cleaning_date'), 'reservations', ['cleaning_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reservations_cleaning_date'), table_name='reservations')
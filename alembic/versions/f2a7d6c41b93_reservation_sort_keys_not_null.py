@@ -0,0 +1,44 @@
+"""reservation sort keys not null
+
+Revision ID: f2a7d6c41b93
+Revises: c81f5d3e7a92
+Create Date: 2026-10-18 18:20:41.507316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7d6c41b93'
+down_revision: Union[str, None] = 'c81f5d3e7a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # cleaning_date and priority are keyset pagination keys, which must not be
+    # NULL. The API always sets both; rows written around it get the model's
+    # default priority and, lacking a cleaning date, their booking time.
+    op.execute("UPDATE reservations SET priority = 'MEDIUM' WHERE priority IS NULL")
+    op.execute(
+        "UPDATE reservations SET cleaning_date = COALESCE(reservation_date, now()) "
+        "WHERE cleaning_date IS NULL"
+    )
+    op.alter_column('reservations', 'cleaning_date', existing_type=sa.DateTime(), nullable=False)
+    op.alter_column(
+        'reservations', 'priority',
+        existing_type=sa.Enum('HIGH', 'MEDIUM', 'LOW', name='prioritytype'),
+        nullable=False
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'reservations', 'priority',
+        existing_type=sa.Enum('HIGH', 'MEDIUM', 'LOW', name='prioritytype'),
+        nullable=True
+    )
+    op.alter_column('reservations', 'cleaning_date', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,77 @@
+"""Measures request latency percentiles under concurrent load.
+
+A cheap "probe" endpoint is hammered while a handful of clients keep a heavy
+endpoint busy at the same time. With blocking queries inside `async def`
+handlers the heavy requests stall the event loop and the probe's p99 climbs
+with them; with the async session the probe should stay flat.
+
+Run it once against the server built from the old commit and once against the
+current tree, with the same arguments:
+
+    uvicorn app.main:app --port 8001 --workers 1
+    python -m app.Scripts.bench_concurrency --token <jwt>
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def probe_worker(client, path, headers, latencies, deadline):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.get(path, headers=headers)
+        latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+
+async def heavy_worker(client, path, headers, deadline):
+    while time.perf_counter() < deadline:
+        await client.get(path, headers=headers)
+
+async def run(args):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    latencies = []
+    limits = httpx.Limits(max_connections=args.concurrency + args.heavy_clients)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        deadline = time.perf_counter() + args.duration
+        workers = [
+            probe_worker(client, args.probe, headers, latencies, deadline)
+            for _ in range(args.concurrency)
+        ]
+        workers += [
+            heavy_worker(client, args.heavy, headers, deadline)
+            for _ in range(args.heavy_clients)
+        ]
+        await asyncio.gather(*workers)
+
+    print(f"probe: {args.probe}  heavy: {args.heavy} x{args.heavy_clients}  concurrency: {args.concurrency}")
+    print(f"requests: {len(latencies)}  throughput: {len(latencies) / args.duration:.1f} req/s")
+    if latencies:
+        print(f"mean: {statistics.mean(latencies):.1f} ms")
+    for pct in (50, 95, 99):
+        print(f"p{pct}: {percentile(latencies, pct):.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent latency benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--probe", default="/groups/1")
+    parser.add_argument("--heavy", default="/reservations/statistics")
+    parser.add_argument("--heavy-clients", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--token", default=None)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Login throughput under concurrent load.
+
+Many clients log in as fast as they can while a few others keep probing a
+cheap endpoint. With bcrypt running inline the probe waits behind every hash;
+with the hashing pool the probe stays flat, logins are capped at the pool's
+throughput and the overflow is rejected with 503 instead of queueing.
+
+Create the user first (POST /users/), then:
+
+    uvicorn app.main:app --port 8001 --workers 1
+    python -m app.Scripts.bench_login --username bench --password bench-password
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from app.Scripts.bench_concurrency import percentile
+
+async def login_worker(client, credentials, latencies, statuses, deadline):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        response = await client.post("/token", json=credentials)
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+async def probe_worker(client, path, latencies, deadline):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.01)
+
+def report(name, latencies, duration):
+    print(f"{name}: {len(latencies)} ok  {len(latencies) / duration:.1f} req/s", end="")
+    if latencies:
+        print(f"  mean {statistics.mean(latencies):.1f} ms", end="")
+    print("".join(f"  p{pct} {percentile(latencies, pct):.1f} ms" for pct in (50, 95, 99)))
+
+async def run(args):
+    credentials = {"username": args.username, "password": args.password}
+    login_latencies, probe_latencies = [], []
+    statuses = Counter()
+    limits = httpx.Limits(max_connections=args.concurrency + args.probe_clients)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        deadline = time.perf_counter() + args.duration
+        workers = [
+            login_worker(client, credentials, login_latencies, statuses, deadline)
+            for _ in range(args.concurrency)
+        ]
+        workers += [
+            probe_worker(client, args.probe, probe_latencies, deadline)
+            for _ in range(args.probe_clients)
+        ]
+        await asyncio.gather(*workers)
+
+    print(f"logins x{args.concurrency}  probe: {args.probe} x{args.probe_clients}")
+    print("status codes: " + ", ".join(f"{code}: {count}" for code, count in sorted(statuses.items())))
+    report("login", login_latencies, args.duration)
+    report("probe", probe_latencies, args.duration)
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent login benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--probe", default="/")
+    parser.add_argument("--probe-clients", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
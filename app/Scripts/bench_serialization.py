@@ -0,0 +1,96 @@
+"""Micro-benchmark: response_model validation vs. the orjson fast path.
+
+No database or server is needed; rows are synthetic tuples shaped like the
+SQLAlchemy Rows `GET /reservations` produces.
+
+    python -m app.Scripts.bench_serialization --sizes 10000 100000 500000
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from pydantic import TypeAdapter
+
+from app.models import PriorityType, SpecializationType
+from app.responses import FastJSONResponse, rows_to_dicts
+from app.schemas import Page, ReservationResponse
+
+ReservationRow = namedtuple("ReservationRow", [
+    "id", "cleaning_type", "address", "house_number", "cleaning_date", "price",
+    "priority", "client_id", "assigned_group_id", "approved_by_client", "approved_by_admin",
+])
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    specializations = [s.value for s in SpecializationType]
+    priorities = list(PriorityType)
+    return [
+        ReservationRow(
+            i,
+            rng.choice(specializations),
+            f"{rng.randint(1, 9999)} Main Street",
+            str(rng.randint(1, 999)),
+            start + timedelta(days=rng.randint(0, 365)),
+            round(rng.uniform(50.0, 500.0), 2),
+            rng.choice(priorities),
+            rng.randint(1, 10000),
+            rng.randint(1, 500),
+            True,
+            rng.random() < 0.5,
+        )
+        for i in range(1, count + 1)
+    ]
+
+def current_path(rows, adapter):
+    """What the endpoint did before: dicts -> validate -> dump -> json.dumps."""
+    items = [
+        {
+            "id": r.id,
+            "cleaning_type": r.cleaning_type,
+            "address": r.address,
+            "house_number": r.house_number,
+            "cleaning_date": r.cleaning_date,
+            "price": r.price,
+            "approved_by_client": r.approved_by_client,
+            "approved_by_admin": r.approved_by_admin,
+            "priority": r.priority.value,
+            "client_id": r.client_id,
+            "assigned_group_id": r.assigned_group_id,
+        }
+        for r in rows
+    ]
+    validated = adapter.validate_python({"items": items, "next_cursor": None})
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+def fast_path(rows):
+    return FastJSONResponse({"items": rows_to_dicts(rows), "next_cursor": None}).body
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk serialization micro-benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(Page[ReservationResponse])
+    print(f"{'rows':>8} {'current (s)':>12} {'fast (s)':>10} {'speedup':>8} {'bytes':>12}")
+    for size in args.sizes:
+        rows = make_rows(size)
+        current, _ = timed(lambda: current_path(rows, adapter), args.repeat)
+        fast, size_bytes = timed(lambda: fast_path(rows), args.repeat)
+        print(f"{size:>8} {current:>12.3f} {fast:>10.3f} {current / fast:>7.1f}x {size_bytes:>12}")
+
+if __name__ == "__main__":
+    main()
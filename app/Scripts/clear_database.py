@@ -1,20 +1,154 @@
-from app.database import SessionLocal, engine, Base
-from app.models import User, Group, Reservation
+import argparse
+import re
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.database import engine, Base
+from app.models import TableChange
+from app.versioning import VERSIONED_TABLES, bump_versions, read_versions
+
+"""Resets the database and manages named snapshots for benchmark runs.
+
+`reset` empties every application table with one TRUNCATE ... RESTART
+IDENTITY CASCADE, so sequences start over and association tables are cleared
+too. table_changes is kept and the versions are bumped instead, so clients
+holding ETags from before the reset never get a false 304.
+
+`snapshot NAME` copies the whole database into a template database and
+`restore NAME` recreates the database from it; Postgres copies the files
+directly, which takes seconds even for a 10M-row dataset. Both need every
+other connection to the databases involved closed, so stop the API first;
+any that are left are terminated. A restore brings back the snapshot's
+table_changes, so afterwards every versioned table is bumped past the
+version the replaced database had reached; an ETag issued before the
+restore never matches again.
+
+    python -m app.Scripts.clear_database reset
+    python -m app.Scripts.clear_database snapshot seeded_10m
+    python -m app.Scripts.clear_database restore seeded_10m
+"""
+
+SNAPSHOT_NAME = re.compile(r"^[a-z0-9_]+$")
 
 def clear_database():
     print("Clearing database...")
-    db = SessionLocal()
+    tables = [
+        table.name for table in reversed(Base.metadata.sorted_tables)
+        if table.name != TableChange.__tablename__
+    ]
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(text(
+            f"TRUNCATE TABLE {', '.join(tables)} RESTART IDENTITY CASCADE"
+        ))
+        bump_versions(connection, VERSIONED_TABLES)
+    print(f"Database cleared in {time.perf_counter() - started:.2f}s ({len(tables)} tables)")
+
+def _database_name() -> str:
+    return make_url(settings.DATABASE_URL).database
+
+def _snapshot_database(name: str) -> str:
+    if not SNAPSHOT_NAME.match(name):
+        raise SystemExit("Snapshot names may only contain lowercase letters, digits and underscores")
+    return f"{_database_name()}_snapshot_{name}"
+
+def _maintenance_engine():
+    url = make_url(settings.DATABASE_URL).set(database="postgres")
+    return create_engine(url, isolation_level="AUTOCOMMIT")
+
+def _terminate_connections(connection, database: str) -> None:
+    connection.execute(
+        text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = :database AND pid <> pg_backend_pid()"),
+        {"database": database}
+    )
+
+def _copy_database(source: str, target: str, replace: bool) -> None:
+    engine.dispose()
+    maintenance = _maintenance_engine()
+    try:
+        with maintenance.connect() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :database"),
+                {"database": target}
+            ).first()
+            if exists and not replace:
+                raise SystemExit(f"Database {target} already exists; pass --replace to overwrite it")
+            _terminate_connections(connection, source)
+            if replace:
+                _terminate_connections(connection, target)
+                connection.execute(text(f'DROP DATABASE IF EXISTS "{target}"'))
+            connection.execute(text(f'CREATE DATABASE "{target}" TEMPLATE "{source}"'))
+    finally:
+        maintenance.dispose()
+
+def create_snapshot(name: str, replace: bool = False) -> None:
+    started = time.perf_counter()
+    _copy_database(_database_name(), _snapshot_database(name), replace)
+    print(f"Snapshot '{name}' created in {time.perf_counter() - started:.1f}s")
+
+def restore_snapshot(name: str) -> None:
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        replaced = read_versions(connection, VERSIONED_TABLES)
+    _copy_database(_snapshot_database(name), _database_name(), replace=True)
+    with engine.begin() as connection:
+        restored = read_versions(connection, VERSIONED_TABLES)
+        bump_versions(connection, VERSIONED_TABLES, {
+            table: max(1, replaced.get(table, 0) - restored.get(table, 0) + 1)
+            for table in VERSIONED_TABLES
+        })
+    print(f"Snapshot '{name}' restored in {time.perf_counter() - started:.1f}s")
+
+def drop_snapshot(name: str) -> None:
+    maintenance = _maintenance_engine()
     try:
-        db.query(Reservation).delete()
-        db.query(Group).delete()
-        db.query(User).delete()
-        db.commit()
-        print("Database cleared successfully!")
-    except Exception as e:
-        print(f"Error clearing database: {e}")
-        db.rollback()
+        with maintenance.connect() as connection:
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{_snapshot_database(name)}"'))
     finally:
-        db.close()
+        maintenance.dispose()
+    print(f"Snapshot '{name}' dropped")
+
+def list_snapshots() -> list:
+    prefix = f"{_database_name()}_snapshot_"
+    maintenance = _maintenance_engine()
+    try:
+        with maintenance.connect() as connection:
+            names = connection.execute(
+                text("SELECT datname FROM pg_database WHERE starts_with(datname, :prefix) ORDER BY datname"),
+                {"prefix": prefix}
+            ).scalars().all()
+    finally:
+        maintenance.dispose()
+    return [name[len(prefix):] for name in names]
+
+def main():
+    parser = argparse.ArgumentParser(description="Reset the database or manage snapshots")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("reset", help="truncate every table and restart sequences")
+    snapshot = commands.add_parser("snapshot", help="save the database as a named snapshot")
+    snapshot.add_argument("name")
+    snapshot.add_argument("--replace", action="store_true", help="overwrite an existing snapshot")
+    restore = commands.add_parser("restore", help="replace the database with a snapshot")
+    restore.add_argument("name")
+    drop = commands.add_parser("drop", help="delete a snapshot")
+    drop.add_argument("name")
+    commands.add_parser("list", help="list snapshots")
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        create_snapshot(args.name, args.replace)
+    elif args.command == "restore":
+        restore_snapshot(args.name)
+    elif args.command == "drop":
+        drop_snapshot(args.name)
+    elif args.command == "list":
+        for name in list_snapshots():
+            print(name)
+    else:
+        clear_database()
 
 if __name__ == "__main__":
-    clear_database() 
\ No newline at end of file
+    main()
@@ -1,110 +1,213 @@
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
-from app.models import User, Group, Reservation, RoleType, SpecializationType, PriorityType
+import argparse
+import io
+import multiprocessing
+import os
+import time
+from datetime import date
+
+import numpy as np
 from faker import Faker
-import random
-from datetime import datetime, timedelta
-import bcrypt
+from sqlalchemy import func
 from tqdm import tqdm
 
-fake = Faker()
+from app.database import SessionLocal, engine
+from app.models import User, Group, Reservation, RoleType, SpecializationType, PriorityType, TaskStatus
+from app.rollups import rebuild_rollups
+from app.task_status import rebuild_status_counters
+from app.versioning import bump_versions
+
+"""Synthetic reservation generator for capacity testing.
+
+Rows are generated column-wise with NumPy in fixed-size chunks and streamed
+into Postgres with COPY FROM STDIN by a pool of worker processes, each with
+its own connection. Chunk i always draws from a generator seeded with
+(seed, i), and cleaning dates are counted from --start (DEFAULT_START unless
+given), so the same --rows/--seed/--chunk-size/--start produce the same data
+on any day and whatever the number of workers.
+
+Each reservation's cleaning type is its group's specialization. With
+--skew > 0, clients are picked with Zipf-like weights (a few clients book
+most of the work) and groups in proportion to their rating.
+
+The load bypasses the ORM, so the daily rollups, task counters and table
+versions are rebuilt afterwards.
+
+    python -m app.Scripts.create_client_reservations --rows 10000000 --workers 8
+"""
+
+COPY_COLUMNS = (
+    "client_id", "cleaning_type", "address", "house_number", "cleaning_date",
+    "reservation_date", "price", "approved_by_client", "approved_by_admin",
+    "priority", "status", "assigned_group_id"
+)
+COPY_SQL = f"COPY reservations ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+
+CLEANING_TYPES = np.array([specialization.value for specialization in SpecializationType])
+# Enum columns store member names.
+PRIORITIES = np.array([priority.name for priority in PriorityType])
+STATUSES = np.array([status.name for status in TaskStatus])
+STATUS_WEIGHTS = [0.7, 0.2, 0.1]
+BOOLEANS = np.array(["f", "t"])
+DEFAULT_START = date(2026, 1, 1)
+
+_context = {}
+
+def _init_worker(context):
+    # Connections inherited from the parent must not be reused in a child.
+    engine.dispose(close=False)
+    _context.update(context)
+
+def _build_chunk(chunk_index: int, rows: int) -> str:
+    rng = np.random.default_rng([_context["seed"], chunk_index])
+    start = _context["start"]
+
+    cleaning_dates = start + rng.integers(1, _context["days"] + 1, rows).astype("timedelta64[D]")
+    reservation_dates = (
+        start.astype("datetime64[s]")
+        - rng.integers(0, 30 * 86400, rows).astype("timedelta64[s]")
+    )
+
+    groups = rng.choice(len(_context["group_ids"]), rows, p=_context["group_weights"])
+
+    columns = [
+        rng.choice(_context["client_ids"], rows, p=_context["client_weights"]).astype(str),
+        _context["group_specializations"][groups],
+        _context["addresses"][rng.integers(0, len(_context["addresses"]), rows)],
+        rng.integers(1, 1000, rows).astype(str),
+        np.datetime_as_string(cleaning_dates.astype("datetime64[s]"), unit="s"),
+        np.datetime_as_string(reservation_dates, unit="s"),
+        np.char.mod("%.2f", rng.uniform(50.0, 200.0, rows)),
+        np.full(rows, "t"),
+        BOOLEANS[rng.integers(0, 2, rows)],
+        PRIORITIES[rng.integers(0, len(PRIORITIES), rows)],
+        STATUSES[rng.choice(len(STATUSES), rows, p=STATUS_WEIGHTS)],
+        _context["group_ids"][groups].astype(str),
+    ]
+    lines = ["\t".join(row) for row in zip(*(column.tolist() for column in columns))]
+    return "\n".join(lines) + "\n"
 
-def hash_password(password: str) -> str:
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+def _copy_chunk(task) -> int:
+    chunk_index, rows = task
+    payload = io.StringIO(_build_chunk(chunk_index, rows))
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(COPY_SQL, payload)
+        connection.commit()
+    finally:
+        connection.close()
+    return rows
+
+def zipf_weights(count: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+def load_context(seed: int, days: int, skew: float = 0.0, start: date = DEFAULT_START) -> dict:
+    db = SessionLocal()
+    try:
+        client_ids = [id[0] for id in db.query(User.id).filter(User.role == RoleType.CLIENT).order_by(User.id).all()]
+        groups = db.query(Group.id, Group.specialization, Group.rating).order_by(Group.id).all()
+    finally:
+        db.close()
 
-def create_reservations(db: Session, num_reservations=500000, batch_size=1000):
-    # Get client and group IDs once at the start
-    client_ids = [id[0] for id in db.query(User.id).filter(User.role == RoleType.CLIENT).all()]
-    group_ids = [id[0] for id in db.query(Group.id).all()]
-    
     if not client_ids:
         raise Exception("No clients available")
-    if not group_ids:
+    if not groups:
         raise Exception("No groups available")
-    
-    print(f"Found {len(client_ids)} clients and {len(group_ids)} groups")
-    print(f"Creating {num_reservations} reservations in batches of {batch_size}...")
-    
-    # Pre-generate common data
-    street_addresses = [fake.street_address() for _ in range(1000)]
-    house_numbers = [str(random.randint(1, 999)) for _ in range(100)]
-    priorities = list(PriorityType)
-    specializations = list(SpecializationType)
-    
-    total_batches = num_reservations // batch_size
-    
-    for batch in tqdm(range(total_batches)):
-        reservations = []
-        for _ in range(batch_size):
-            cleaning_date = datetime.now() + timedelta(days=random.randint(1, 365))
-            
-            reservation = Reservation(
-                client_id=random.choice(client_ids),
-                cleaning_type=random.choice(specializations),
-                address=random.choice(street_addresses),
-                house_number=random.choice(house_numbers),
-                cleaning_date=cleaning_date,
-                price=round(random.uniform(50.0, 200.0), 2),
-                approved_by_client=True,
-                approved_by_admin=random.choice([True, False]),
-                priority=random.choice(priorities),
-                assigned_group_id=random.choice(group_ids)
-            )
-            reservations.append(reservation)
-        
-        db.bulk_save_objects(reservations)
-        db.commit()
-    
-    # Handle remaining reservations
-    remaining = num_reservations % batch_size
-    if remaining:
-        reservations = []
-        for _ in range(remaining):
-            cleaning_date = datetime.now() + timedelta(days=random.randint(1, 365))
-            
-            reservation = Reservation(
-                client_id=random.choice(client_ids),
-                cleaning_type=random.choice(specializations),
-                address=random.choice(street_addresses),
-                house_number=random.choice(house_numbers),
-                cleaning_date=cleaning_date,
-                price=round(random.uniform(50.0, 200.0), 2),
-                approved_by_client=True,
-                approved_by_admin=random.choice([True, False]),
-                priority=random.choice(priorities),
-                assigned_group_id=random.choice(group_ids)
-            )
-            reservations.append(reservation)
-        
-        db.bulk_save_objects(reservations)
-        db.commit()
-    
-    return num_reservations
+    print(f"Found {len(client_ids)} clients and {len(groups)} groups")
+
+    client_weights = group_weights = None
+    if skew > 0:
+        client_weights = zipf_weights(len(client_ids), skew)
+        # Shuffled so the busiest clients are not simply the oldest accounts.
+        np.random.default_rng(seed).shuffle(client_weights)
+        ratings = np.array([rating or 0.0 for _, _, rating in groups]) + 1.0
+        group_weights = ratings ** skew / (ratings ** skew).sum()
+
+    fake = Faker()
+    Faker.seed(seed)
+    # COPY text format: tabs, newlines and backslashes would need escaping.
+    addresses = [
+        fake.street_address().replace("\\", " ").replace("\t", " ").replace("\n", " ")
+        for _ in range(1000)
+    ]
+    return {
+        "seed": seed,
+        "days": days,
+        "start": np.datetime64(start, "D"),
+        "client_ids": np.array(client_ids),
+        "client_weights": client_weights,
+        "group_ids": np.array([group_id for group_id, _, _ in groups]),
+        "group_specializations": np.array([
+            specialization.value if specialization else CLEANING_TYPES[0]
+            for _, specialization, _ in groups
+        ]),
+        "group_weights": group_weights,
+        "addresses": np.array(addresses),
+    }
+
+def create_reservations(
+    rows: int, workers: int, chunk_size: int, seed: int, days: int,
+    skew: float = 0.0, start: date = DEFAULT_START
+) -> int:
+    context = load_context(seed, days, skew, start)
+    tasks = [
+        (index, min(chunk_size, rows - offset))
+        for index, offset in enumerate(range(0, rows, chunk_size))
+    ]
+    print(f"Creating {rows} reservations in {len(tasks)} chunks with {workers} workers...")
+
+    created = 0
+    # spawn: callers such as seed_database keep other threads running meanwhile,
+    # and a forked child could inherit a lock one of them was holding.
+    spawn = multiprocessing.get_context("spawn")
+    with spawn.Pool(workers, initializer=_init_worker, initargs=(context,)) as pool:
+        with tqdm(total=rows, unit="rows") as progress:
+            for done in pool.imap_unordered(_copy_chunk, tasks):
+                created += done
+                progress.update(done)
+    return created
+
+def refresh_derived_tables(tables=("reservations",)) -> None:
+    """Rebuild rollups and counters, bump `tables`' versions and ANALYZE them."""
+    with engine.begin() as connection:
+        rollup_rows = rebuild_rollups(connection)
+        counter_rows = rebuild_status_counters(connection)
+        bump_versions(connection, set(tables))
+    with engine.connect() as connection:
+        for table in tables:
+            connection.exec_driver_sql(f"ANALYZE {table}")
+        connection.commit()
+    print(f"Rebuilt {rollup_rows} rollup rows and {counter_rows} task counter rows")
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic reservations with COPY")
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=date.fromisoformat, default=DEFAULT_START, help="first day cleaning dates count from (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=365, help="cleaning dates fall within this many days after --start")
+    parser.add_argument("--skew", type=float, default=0.0, help="0 picks clients and groups uniformly")
+    args = parser.parse_args()
+
     print("Starting reservation creation process...")
+    started = time.perf_counter()
+    created = create_reservations(args.rows, args.workers, args.chunk_size, args.seed, args.days, args.skew, args.start)
+    elapsed = time.perf_counter() - started
+    print(f"Copied {created} reservations in {elapsed:.1f}s ({created / elapsed:,.0f} rows/s)")
+
+    refresh_derived_tables()
+
     db = SessionLocal()
     try:
-        total_created = create_reservations(db, num_reservations=500000)
-        
-        # Get summary statistics
-        total_count = db.query(Reservation).count()
-        unique_clients = db.query(Reservation.client_id).distinct().count()
-        unique_groups = db.query(Reservation.assigned_group_id).distinct().count()
-        
+        total_count = db.query(func.count(Reservation.id)).scalar()
+        unique_groups = db.query(func.count(func.distinct(Reservation.assigned_group_id))).scalar()
         print("\nSummary:")
-        print(f"Total reservations created: {total_count}")
-        print(f"Unique clients used: {unique_clients}")
+        print(f"Total reservations: {total_count}")
         print(f"Unique groups assigned: {unique_groups}")
-        
-    except Exception as e:
-        print(f"Error occurred: {e}")
-        db.rollback()
     finally:
         db.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
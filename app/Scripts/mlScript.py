@@ -1,7 +1,14 @@
 import os
-import requests
 import pandas as pd
-from .tabulate import create_html_table_with_borders
+from sqlalchemy.exc import SQLAlchemyError
+from app.joins import CsvOutput, stream_joins
+from app.loader import (
+    load_groups, load_reservations, reservation_price_summary,
+    average_price_by_cleaning_type, reservation_count_by_priority
+)
+from app.reports import ReportRenderer, report_name
+
+RESERVATION_CHUNK_SIZE = 100000
 
 """delete the file(csv) data if it exists and then write data to it."""
 def write_to_csv(file_path, data_frame, delimiter=','):
@@ -11,112 +18,84 @@ def write_to_csv(file_path, data_frame, delimiter=','):
     data_frame.to_csv(file_path, index=False, sep=delimiter)
     print(f"Data written to '{file_path}' in tabulated format")
 
-try:
-    BASE_URL = 'http://127.0.0.1:8001'
-
-    print("Fetching groups data...")
-    groups_api = requests.get(f'{BASE_URL}/groups/all')
-    groups_api.raise_for_status()
-    groups_api_data = groups_api.json()
-    # print(f"Successfully fetched {len(groups_api_data)} groups")
-
-    print("Fetching reservations data...")
-    reservations_api = requests.get(f'{BASE_URL}/reservations')
-    reservations_api.raise_for_status()
-    reservations_api_data = reservations_api.json()
-    # print(f"Successfully fetched {len(reservations_api_data)} reservations")
-
-    # Convert the data into pandas DataFrames
-    
-    groups_df = pd.DataFrame(groups_api_data)
-    write_to_csv('groups_data.csv', groups_df)
-
-    reservations_df = pd.DataFrame(reservations_api_data)
-    write_to_csv('reservations_data.csv', reservations_df)
-    
-    
-    print("Performing data merges...")
-
-    # Inner join - only matching records between both DataFrames
-    inner_join_df = pd.merge(reservations_df, groups_df,
-                             left_on='assigned_group_id', right_on='id',
-                             how='inner')
-    write_to_csv('inner_join.csv', inner_join_df)
-
-    # Outer join - all records from both DataFrames
-    outer_join_df = pd.merge(reservations_df, groups_df,
-                             left_on='assigned_group_id', right_on='id',
-                             how='outer')
-    write_to_csv('outer_join.csv', outer_join_df)
-
-    # Right join - all records from groups DataFrame
-    right_join_df = pd.merge(reservations_df, groups_df,
-                             left_on='assigned_group_id', right_on='id',
-                             how='right')
-    write_to_csv('right_join.csv', right_join_df)
-
-    # Left join - all records from reservations DataFrame
-    left_join_df = pd.merge(reservations_df, groups_df,
-                            left_on='assigned_group_id', right_on='id',
-                            how='left')
-    write_to_csv('left_join.csv', left_join_df)
-
-    # Cross join - cartesian product of both DataFrames
-    # This should take much longer for large datasets and also large memory is to be consumed
-    cross_join_df = pd.merge(reservations_df.assign(key=1), groups_df.assign(key=1), on='key').drop('key', axis=1)
-    write_to_csv('cross_join.csv', cross_join_df)
-
-    # Analyze null values in the merged DataFrames
-    null_values_df = pd.DataFrame({
-        'Inner Join Nulls': inner_join_df.isnull().sum(),
-        'Outer Join Nulls': outer_join_df.isnull().sum(),
-        'Right Join Nulls': right_join_df.isnull().sum(),
-        'Left Join Nulls': left_join_df.isnull().sum()
-    }).reset_index()
-    null_values_df.columns = ['Column', 'Inner Join Nulls', 'Outer Join Nulls', 'Right Join Nulls', 'Left Join Nulls']
-    write_to_csv('null_values_analysis.csv', null_values_df)
-
-    # Basic statistics for numeric columns
-    if 'rating' in groups_df.columns:
-        groups_rating_stats = groups_df['rating'].describe().reset_index()
-        groups_rating_stats.columns = ['Statistic', 'Groups Rating']
-        write_to_csv('groups_rating_stats.csv', groups_rating_stats)
-
-    if 'price' in reservations_df.columns:
-        reservations_price_stats = reservations_df['price'].describe().reset_index()
-        reservations_price_stats.columns = ['Statistic', 'Reservations Price']
-        write_to_csv('reservations_price_stats.csv', reservations_price_stats)
-
-    # Group by analysis
-    if 'cleaning_type' in reservations_df.columns and 'price' in reservations_df.columns:
-        cleaning_type_avg_price = reservations_df.groupby('cleaning_type')['price'].mean().reset_index()
-        cleaning_type_avg_price.columns = ['Cleaning Type', 'Average Price']
-        write_to_csv('cleaning_type_avg_price.csv', cleaning_type_avg_price)
-
-    if 'priority' in reservations_df.columns:
-        priority_count = reservations_df.groupby('priority').size().reset_index(name='Count')
-        priority_count.columns = ['Priority', 'Reservation Count']
-        write_to_csv('priority_count.csv', priority_count)
-
-    # Call the function to create HTML tables with borders for each CSV file
-    create_html_table_with_borders('groups_data.csv')
-    create_html_table_with_borders('reservations_data.csv')
-    create_html_table_with_borders('inner_join.csv')
-    create_html_table_with_borders('outer_join.csv')
-    create_html_table_with_borders('right_join.csv')
-    create_html_table_with_borders('left_join.csv')
-    create_html_table_with_borders('null_values_analysis.csv')
-    create_html_table_with_borders('groups_rating_stats.csv')
-    create_html_table_with_borders('reservations_price_stats.csv')
-    create_html_table_with_borders('cleaning_type_avg_price.csv')
-    create_html_table_with_borders('priority_count.csv')
-
-except requests.exceptions.RequestException as e:
-    print(f"Error fetching data from API: {e}")
-    print("Please make sure the server is running on port 8001")
-except KeyError as e:
-    print(f"Error accessing DataFrame column: {e}")
-    print("Available columns in groups_df:", groups_df.columns if 'groups_df' in locals() else "Not available")
-    print("Available columns in reservations_df:", reservations_df.columns if 'reservations_df' in locals() else "Not available")
-except Exception as e:
-    print(f"An unexpected error occurred: {e}")
+"""Write a report's CSV and queue its HTML pages, rendered from the same frame."""
+def write_report(file_path, data_frame, reports):
+    write_to_csv(file_path, data_frame)
+    reports.render(data_frame, report_name(file_path))
+
+def main():
+    try:
+        # HTML pages are rendered by a process pool while the analysis goes on.
+        with ReportRenderer() as reports:
+            # Read straight from the database; no running API needed.
+            print("Loading groups data...")
+            groups_df = load_groups()
+            write_report('groups_data.csv', groups_df, reports)
+
+            # Reservations are never held in memory as a whole: each chunk is written
+            # to reservations_data.csv and joined against groups as it arrives.
+            reservations_csv = CsvOutput('reservations_data.csv', report=reports.paged('reservations_data'))
+
+            def reservation_chunks():
+                try:
+                    for chunk in load_reservations(chunk_size=RESERVATION_CHUNK_SIZE):
+                        reservations_csv.write(chunk)
+                        yield chunk
+                finally:
+                    reservations_csv.close()
+
+            print("Performing data merges...")
+            # The cross join is the cartesian product of both tables; it is written in
+            # slices but still produces reservations x groups rows on disk.
+            joins = stream_joins(reservation_chunks(), groups_df, {
+                'inner': 'inner_join.csv',
+                'outer': 'outer_join.csv',
+                'right': 'right_join.csv',
+                'left': 'left_join.csv',
+                'cross': 'cross_join.csv',
+            }, reports=reports)
+            print(f"Data written to '{reservations_csv.path}' ({reservations_csv.rows} rows)")
+            for output in joins.values():
+                print(f"Data written to '{output.path}' ({output.rows} rows)")
+
+            # Null counts were accumulated while the joins were written
+            null_values_df = pd.DataFrame({
+                'Inner Join Nulls': joins['inner'].nulls,
+                'Outer Join Nulls': joins['outer'].nulls,
+                'Right Join Nulls': joins['right'].nulls,
+                'Left Join Nulls': joins['left'].nulls
+            }).fillna(0).astype('int64').reset_index()
+            null_values_df.columns = ['Column', 'Inner Join Nulls', 'Outer Join Nulls', 'Right Join Nulls', 'Left Join Nulls']
+            write_report('null_values_analysis.csv', null_values_df, reports)
+
+            # Basic statistics for numeric columns
+            if 'rating' in groups_df.columns:
+                groups_rating_stats = groups_df['rating'].describe().reset_index()
+                groups_rating_stats.columns = ['Statistic', 'Groups Rating']
+                write_report('groups_rating_stats.csv', groups_rating_stats, reports)
+
+            # Reservation aggregates are computed by the database
+            reservations_price_stats = reservation_price_summary().reset_index()
+            reservations_price_stats.columns = ['Statistic', 'Reservations Price']
+            write_report('reservations_price_stats.csv', reservations_price_stats, reports)
+
+            # Group by analysis
+            cleaning_type_avg_price = average_price_by_cleaning_type()
+            cleaning_type_avg_price.columns = ['Cleaning Type', 'Average Price']
+            write_report('cleaning_type_avg_price.csv', cleaning_type_avg_price, reports)
+
+            priority_count = reservation_count_by_priority()
+            priority_count.columns = ['Priority', 'Reservation Count']
+            write_report('priority_count.csv', priority_count, reports)
+
+    except SQLAlchemyError as e:
+        print(f"Error loading data from the database: {e}")
+        print("Please make sure DATABASE_URL points to a reachable database")
+    except KeyError as e:
+        print(f"Error accessing DataFrame column: {e}")
+        print("Available columns in groups_df:", groups_df.columns if 'groups_df' in locals() else "Not available")
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from app.database import engine
+from app.rollups import rebuild_rollups
+
+def main():
+    print("Rebuilding daily reservation rollups...")
+    with engine.begin() as connection:
+        rows = rebuild_rollups(connection)
+    print(f"Rebuilt {rows} rollup rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+from app.database import engine
+from app.task_status import rebuild_status_counters
+
+def main():
+    print("Rebuilding group task counters...")
+    with engine.begin() as connection:
+        rows = rebuild_status_counters(connection)
+    print(f"Rebuilt {rows} counter rows")
+
+if __name__ == "__main__":
+    main()
@@ -1,134 +1,177 @@
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine, Base
-from app.models import User, Group, Reservation, RoleType, SpecializationType, PriorityType
+import argparse
+import io
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from multiprocessing import Pool
+
+import numpy as np
 from faker import Faker
-import random
-from datetime import datetime, timedelta
 from passlib.context import CryptContext
 
-fake = Faker()
+from app.database import SessionLocal, engine, Base
+from app.models import User, Group, RoleType, SpecializationType
+from app.Scripts.create_client_reservations import DEFAULT_START, create_reservations, refresh_derived_tables
+
+"""Seeds users, groups, memberships and reservations at any scale.
+
+--scale 1 reproduces the original small dataset (1 admin, 79 clients, 25
+groups, 200 reservations). Clients and reservations grow linearly with the
+scale and groups with its square root, so e.g. --scale 25000 gives about
+2M clients, 4k groups and 5M reservations; --clients, --groups and
+--reservations override individual counts. Every group gets a chief of its
+own, so there are as many chiefs as groups.
+
+Passwords are hashed once per distinct password and the hash is reused for
+every account. All tables are loaded with COPY: clients in parallel chunks,
+then groups, then memberships and reservations at the same time. Specialization
+and group ratings are skewed, reservations follow a Zipf-like per-client
+distribution (see create_client_reservations). The database must not contain
+users yet; run clear_database first.
+
+    python -m app.Scripts.seed_database --scale 25000 --workers 8
+"""
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def create_seed_data():
+# Relative frequency of each specialization among groups.
+SPECIALIZATION_WEIGHTS = np.array([0.25, 0.2, 0.15, 0.1, 0.05, 0.15, 0.1])
+CHUNK_SIZE = 100000
+
+def copy_rows(table: str, columns, lines) -> None:
+    payload = io.StringIO("".join(f"{line}\n" for line in lines))
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", payload)
+        connection.commit()
+    finally:
+        connection.close()
+
+def user_lines(role: RoleType, prefix: str, start: int, count: int, names, password_hash: str):
+    for index in range(start, start + count):
+        username = f"{prefix}_{names[index % len(names)]}{index}"
+        yield f"{username}\t{username}@example.com\t{role.name}\t{password_hash}"
+
+def _init_worker():
+    engine.dispose(close=False)
+
+def _copy_clients(task) -> int:
+    start, count, names, password_hash = task
+    copy_rows(
+        "users",
+        ("username", "email", "role", "password_hash"),
+        user_lines(RoleType.CLIENT, "client", start, count, names, password_hash)
+    )
+    return count
+
+def role_ids(role: RoleType) -> np.ndarray:
     db = SessionLocal()
     try:
-        users = create_users(db)
-        groups = create_groups(db, users)
-        create_reservations(db, users, groups)
-        
-        db.commit()
-    except Exception as e:
-        print(f"Error seeding database: {e}")
-        db.rollback()
+        return np.array([id[0] for id in db.query(User.id).filter(User.role == role).order_by(User.id).all()])
     finally:
         db.close()
 
-def create_users(db: Session, num_users=150):
-    users = []
-    
-    admin = User(
-        username="admin",
-        email="admin@example.com",
-        password_hash=pwd_context.hash("admin123"),
-        role=RoleType.ADMIN
+def create_users(pool, clients: int, chiefs: int, members: int, names, hashes) -> None:
+    copy_rows(
+        "users",
+        ("username", "email", "role", "password_hash"),
+        [f"admin\tadmin@example.com\t{RoleType.ADMIN.name}\t{hashes['admin']}"]
+    )
+    staff = list(user_lines(RoleType.CHIEF, "chief", 0, chiefs, names, hashes["staff"]))
+    staff += user_lines(RoleType.MEMBER, "member", 0, members, names, hashes["staff"])
+    copy_rows("users", ("username", "email", "role", "password_hash"), staff)
+
+    tasks = [
+        (start, min(CHUNK_SIZE, clients - start), names, hashes["staff"])
+        for start in range(0, clients, CHUNK_SIZE)
+    ]
+    for _ in pool.imap_unordered(_copy_clients, tasks):
+        pass
+
+def create_groups(rng, count: int, chief_ids, companies) -> None:
+    # User.group_as_chief is a scalar relationship: a chief leads one group.
+    if len(chief_ids) < count:
+        raise SystemExit(f"{count} groups need at least {count} chiefs, found {len(chief_ids)}")
+    specializations = np.array([specialization.name for specialization in SpecializationType])
+    chosen = rng.choice(specializations, count, p=SPECIALIZATION_WEIGHTS)
+    # Most teams rate well, a few do not.
+    ratings = np.round(3.0 + 2.0 * rng.beta(5, 2, count), 1)
+    lines = (
+        f"Team {companies[index % len(companies)]} {index}\t{chosen[index]}\t{ratings[index]}"
+        f"\t{ratings[index]}\t1\t{chief_ids[index]}"
+        for index in range(count)
     )
-    users.append(admin)
-    
-    for i in range(20):
-        chief = User(
-            username=f"chief_{fake.unique.user_name()}",
-            email=fake.unique.email(),
-            password_hash=pwd_context.hash("password123"),
-            role=RoleType.CHIEF
-        )
-        users.append(chief)
-    
-    for i in range(50):
-        member = User(
-            username=f"member_{fake.unique.user_name()}",
-            email=fake.unique.email(),
-            password_hash=pwd_context.hash("password123"),
-            role=RoleType.MEMBER
-        )
-        users.append(member)
-    
-    for i in range(79):
-        client = User(
-            username=f"client_{fake.unique.user_name()}",
-            email=fake.unique.email(),
-            password_hash=pwd_context.hash("password123"),
-            role=RoleType.CLIENT
-        )
-        users.append(client)
-    
-    db.add_all(users)
-    db.commit()
-    return users
-
-def create_groups(db: Session, users, num_groups=25):
-    groups = []
-    chiefs = [u for u in users if u.role == RoleType.CHIEF]
-    members = [u for u in users if u.role == RoleType.MEMBER]
-    
-    for i in range(num_groups):
-        chief = chiefs[i % len(chiefs)]
-        group_members = random.sample(members, random.randint(2, 5))
-        
-        group = Group(
-            name=f"Team {fake.unique.company()}",
-            specialization=random.choice(list(SpecializationType)),
-            rating=round(random.uniform(3.0, 5.0), 1),
-            chief_id=chief.id,
-            members=group_members
-        )
-        groups.append(group)
-    
-    db.add_all(groups)
-    db.commit()
-    return groups
-
-def create_reservations(db: Session, users, groups, num_reservations=200):
-    reservations = []
-    clients = [u for u in users if u.role == RoleType.CLIENT]
-    
-    start_date = datetime.now() - timedelta(days=90)
-    
-    for i in range(num_reservations):
-        client = random.choice(clients)
-        group = random.choice(groups)
-        
-        random_days = random.randint(0, 180)
-        cleaning_date = start_date + timedelta(days=random_days)
-        
-        reservation_date = cleaning_date - timedelta(days=random.randint(1, 30))
-        
-        reservation = Reservation(
-            client_id=client.id,
-            cleaning_type=group.specialization,
-            address=fake.street_address(),
-            house_number=str(random.randint(1, 999)),
-            cleaning_date=cleaning_date.date(),
-            reservation_date=reservation_date,
-            price=round(random.uniform(50.0, 500.0), 2),
-            approved_by_client=random.choice([True, False]),
-            approved_by_admin=random.choice([True, False]),
-            priority=random.choice(list(PriorityType)),
-            assigned_group_id=group.id
-        )
-        reservations.append(reservation)
-    
-    db.add_all(reservations)
-    db.commit()
-    return reservations
+    copy_rows("groups", ("name", "specialization", "rating", "rating_sum", "rating_count", "chief_id"), lines)
+
+def create_memberships(seed: int, group_ids, member_ids) -> int:
+    rng = np.random.default_rng([seed, 1])
+    sizes = rng.integers(2, 6, len(group_ids))
+    lines = []
+    for group_id, size in zip(group_ids.tolist(), sizes.tolist()):
+        for member_id in rng.choice(member_ids, min(size, len(member_ids)), replace=False).tolist():
+            lines.append(f"{member_id}\t{group_id}")
+    copy_rows("group_members", ("user_id", "group_id"), lines)
+    return len(lines)
 
 def main():
+    parser = argparse.ArgumentParser(description="Seed the database at a configurable scale")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--clients", type=int, default=None)
+    parser.add_argument("--groups", type=int, default=None)
+    parser.add_argument("--reservations", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.1)
+    parser.add_argument("--start", type=date.fromisoformat, default=DEFAULT_START, help="first day reservation dates count from (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    clients = args.clients or max(1, round(79 * args.scale))
+    groups = args.groups or max(1, round(25 * math.sqrt(args.scale)))
+    reservations = args.reservations if args.reservations is not None else round(200 * args.scale)
+    chiefs = groups
+    members = max(5, groups * 2)
+
     print("Starting database seeding...")
-    
+    print(f"{clients} clients, {chiefs} chiefs, {members} members, {groups} groups, {reservations} reservations")
+    started = time.perf_counter()
+
     Base.metadata.create_all(bind=engine)
-    
-    create_seed_data()
-    
-    print("Database seeding completed!")
+    db = SessionLocal()
+    try:
+        if db.query(User.id).first() is not None:
+            raise SystemExit("The users table is not empty; run clear_database first.")
+    finally:
+        db.close()
+
+    hashes = {"admin": pwd_context.hash("admin123"), "staff": pwd_context.hash("password123")}
+    fake = Faker()
+    Faker.seed(args.seed)
+    names = [fake.user_name() for _ in range(5000)]
+    companies = [fake.company().replace("\t", " ") for _ in range(5000)]
+    rng = np.random.default_rng(args.seed)
+
+    with Pool(args.workers, initializer=_init_worker) as pool:
+        create_users(pool, clients, chiefs, members, names, hashes)
+    print(f"Users loaded after {time.perf_counter() - started:.1f}s")
+
+    create_groups(rng, groups, role_ids(RoleType.CHIEF), companies)
+    db = SessionLocal()
+    try:
+        group_ids = np.array([id[0] for id in db.query(Group.id).order_by(Group.id).all()])
+    finally:
+        db.close()
+
+    with ThreadPoolExecutor(max_workers=1) as memberships:
+        membership_rows = memberships.submit(create_memberships, args.seed, group_ids, role_ids(RoleType.MEMBER))
+        if reservations:
+            create_reservations(reservations, args.workers, CHUNK_SIZE, args.seed, 365, args.skew, args.start)
+        print(f"{membership_rows.result()} memberships loaded")
+
+    refresh_derived_tables(("users", "groups", "group_members", "reservations"))
+    print(f"Database seeding completed in {time.perf_counter() - started:.1f}s")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
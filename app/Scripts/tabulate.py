@@ -1,8 +1,16 @@
+import os
+
 import pandas as pd
 
-"""Reads CSV data and outputs it as an HTML table with borders."""
+from app.reports import REPORT_PAGE_ROWS, render_page, report_name
+
+"""Reads CSV data and outputs it as an HTML table with borders.
+
+mlScript renders its reports from memory through app.reports; this is kept
+for turning an existing CSV file into the same paginated HTML.
+"""
 
-def create_html_table_with_borders(file_path):
+def create_html_table_with_borders(file_path, page_rows=REPORT_PAGE_ROWS):
     try:
         # Read the CSV file into a DataFrame
         df = pd.read_csv(file_path)
@@ -10,15 +18,15 @@ def create_html_table_with_borders(file_path):
         # Remove duplicates if any
         df = df.drop_duplicates()
 
-        # Create HTML table with borders
-        html_table = df.to_html(border=1, index=False)
-
-        # Save the HTML output to a file
-        html_file_path = file_path.replace('.csv', '_table_with_borders.html')
-        with open(html_file_path, 'w') as f:
-            f.write(html_table)
-
-        print(f"HTML table with borders has been written to '{html_file_path}'.")
+        # Create HTML tables with borders, one file per page
+        name = report_name(file_path)
+        directory = os.path.dirname(file_path) or "."
+        pages = max(1, -(-len(df) // page_rows))
+        for page in range(1, pages + 1):
+            html_file_path = render_page(
+                df.iloc[(page - 1) * page_rows:page * page_rows], name, page, page == pages, directory
+            )
+            print(f"HTML table with borders has been written to '{html_file_path}'.")
 
     except Exception as e:
         print(f"An error occurred while creating the HTML table: {e}")
@@ -0,0 +1,108 @@
+import abc
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from jose import JWTError, jwt
+
+from app.auth_cache import cached_username, remember_claims
+from app.config import settings
+
+"""Admission control: per-client rate limits and per-route concurrency caps.
+
+Every request takes a token from its client's bucket (RATE_LIMIT_PER_SECOND
+refill, RATE_LIMIT_BURST capacity); the client is the authenticated user when
+the request carries a valid token and the remote address otherwise. Routes
+listed in ROUTE_CONCURRENCY_LIMITS ("METHOD /path": limit) additionally admit
+only that many requests at a time across all clients.
+
+The state lives behind AdmissionStore. InMemoryAdmissionStore keeps it per
+process, so with N workers the effective limits are N times higher; a shared
+store (e.g. Redis) can implement the same four methods.
+"""
+
+
+class AdmissionStore(abc.ABC):
+    @abc.abstractmethod
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        """Consume one token; 0 if admitted, else seconds until one is available."""
+
+    @abc.abstractmethod
+    async def acquire(self, key: str, limit: int) -> bool:
+        """Take one of `limit` concurrent slots for `key`, without waiting."""
+
+    @abc.abstractmethod
+    async def release(self, key: str) -> None:
+        """Give back a slot taken by `acquire`."""
+
+    @abc.abstractmethod
+    async def snapshot(self) -> dict:
+        """Current state for /health/admission."""
+
+
+class InMemoryAdmissionStore(AdmissionStore):
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight = {}
+
+    async def take_token(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate if rate > 0 else 60.0
+        # Re-inserted at the end, so the least recently seen clients are the
+        # ones dropped (an evicted client simply starts with a full bucket).
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        if self._in_flight.get(key, 0) >= limit:
+            return False
+        self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        return True
+
+    async def release(self, key: str) -> None:
+        remaining = self._in_flight.get(key, 0) - 1
+        if remaining > 0:
+            self._in_flight[key] = remaining
+        else:
+            self._in_flight.pop(key, None)
+
+    async def snapshot(self) -> dict:
+        return {"clients": len(self._buckets), "in_flight": dict(self._in_flight)}
+
+
+def client_key(scope) -> str:
+    """'user:<name>' for a valid bearer token, 'ip:<address>' otherwise."""
+    for name, value in scope.get("headers", ()):
+        if name != b"authorization":
+            continue
+        scheme, _, token = value.decode("latin-1").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            break
+        username = cached_username(token)
+        if username is None:
+            try:
+                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+            except JWTError:
+                break
+            if payload.get("sub") is None:
+                break
+            remember_claims(token, payload)
+            username = payload["sub"]
+        return f"user:{username}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+def route_limit(scope) -> Optional[int]:
+    return settings.ROUTE_CONCURRENCY_LIMITS.get(f"{scope['method']} {scope['path']}")
+
+
+admission_store = InMemoryAdmissionStore()
@@ -0,0 +1,182 @@
+import asyncio
+import heapq
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Group, Reservation, SpecializationType
+
+"""Capacity-aware group assignment for new reservations.
+
+For every specialization the engine keeps the candidate groups and, per
+cleaning day, a max-heap on rating of the groups that still have spare
+capacity that day together with their booked load. Picking a group is a heap
+peek plus an in-place load increment; a group is popped once it is full, so
+each assignment costs O(log n) and the next-best group takes over instead of
+every request landing on the single top-rated team.
+
+The index is per process. Group changes invalidate it explicitly, other
+writers (other workers, scripts) are picked up when an entry is older than
+ASSIGNMENT_INDEX_TTL_SECONDS.
+
+A rebuilt index only counts committed reservations, so slots handed out by
+assign() are also kept per day in a pending table until the caller reports
+the outcome: confirm() once the reservation is committed, release() if it is
+not. Pending slots are added back onto every rebuilt load, so an
+invalidation or expiry cannot hand the same capacity out twice.
+"""
+
+MAX_DAY_INDEXES = 2048
+
+def _spec_key(specialization) -> str:
+    return getattr(specialization, "value", specialization)
+
+def _day_key(day) -> date:
+    return day.date() if isinstance(day, datetime) else day
+
+
+class _DayIndex:
+    def __init__(self, candidates: List[Tuple[float, int]], load: Dict[int, int], capacity: int):
+        self.loaded_at = time.monotonic()
+        self.load = load
+        self.ratings = {group_id: rating for rating, group_id in candidates}
+        self.heap = [
+            (-rating, group_id)
+            for rating, group_id in candidates
+            if load.get(group_id, 0) < capacity
+        ]
+        heapq.heapify(self.heap)
+
+
+class AssignmentEngine:
+    def __init__(self, daily_capacity: int, ttl_seconds: float):
+        self.daily_capacity = daily_capacity
+        self.ttl_seconds = ttl_seconds
+        self._candidates: Dict[str, Tuple[float, List[Tuple[float, int]]]] = {}
+        self._days: "OrderedDict[Tuple[str, date], _DayIndex]" = OrderedDict()
+        self._pending: Dict[Tuple[str, date], Dict[int, int]] = {}
+        self._lock = asyncio.Lock()
+
+    def _fresh(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at < self.ttl_seconds
+
+    async def _load_candidates(self, db: AsyncSession, spec: str) -> List[Tuple[float, int]]:
+        cached = self._candidates.get(spec)
+        if cached and self._fresh(cached[0]):
+            return cached[1]
+        result = await db.execute(
+            select(Group.rating, Group.id).where(Group.specialization == SpecializationType(spec))
+        )
+        candidates = [(rating or 0.0, group_id) for rating, group_id in result.all()]
+        self._candidates[spec] = (time.monotonic(), candidates)
+        return candidates
+
+    async def _load_day(self, db: AsyncSession, spec: str, day: date) -> _DayIndex:
+        key = (spec, day)
+        index = self._days.get(key)
+        if index and self._fresh(index.loaded_at):
+            self._days.move_to_end(key)
+            return index
+
+        candidates = await self._load_candidates(db, spec)
+        load = {}
+        if candidates:
+            start = datetime.combine(day, datetime.min.time())
+            result = await db.execute(
+                select(Reservation.assigned_group_id, func.count(Reservation.id))
+                .where(
+                    Reservation.assigned_group_id.in_([group_id for _, group_id in candidates]),
+                    Reservation.cleaning_date >= start,
+                    Reservation.cleaning_date < start + timedelta(days=1)
+                )
+                .group_by(Reservation.assigned_group_id)
+            )
+            load = dict(result.all())
+        for group_id, pending in self._pending.get(key, {}).items():
+            load[group_id] = load.get(group_id, 0) + pending
+
+        index = _DayIndex(candidates, load, self.daily_capacity)
+        self._days[key] = index
+        self._days.move_to_end(key)
+        while len(self._days) > MAX_DAY_INDEXES:
+            self._days.popitem(last=False)
+        return index
+
+    async def assign(self, db: AsyncSession, specialization, day) -> Optional[int]:
+        """Reserve a slot on the best-rated group with spare capacity, or None.
+
+        A returned slot stays pending until confirm() or release() is called.
+        """
+        spec, day = _spec_key(specialization), _day_key(day)
+        async with self._lock:
+            index = await self._load_day(db, spec, day)
+
+        while index.heap:
+            _, group_id = index.heap[0]
+            booked = index.load.get(group_id, 0)
+            if booked >= self.daily_capacity:
+                heapq.heappop(index.heap)
+                continue
+            index.load[group_id] = booked + 1
+            if booked + 1 >= self.daily_capacity:
+                heapq.heappop(index.heap)
+            pending = self._pending.setdefault((spec, day), {})
+            pending[group_id] = pending.get(group_id, 0) + 1
+            return group_id
+        return None
+
+    async def has_candidates(self, db: AsyncSession, specialization) -> bool:
+        async with self._lock:
+            return bool(await self._load_candidates(db, _spec_key(specialization)))
+
+    def _settle(self, key: Tuple[str, date], group_id: int) -> bool:
+        pending = self._pending.get(key)
+        if not pending or not pending.get(group_id):
+            return False
+        pending[group_id] -= 1
+        if not pending[group_id]:
+            del pending[group_id]
+        if not pending:
+            del self._pending[key]
+        return True
+
+    def confirm(self, specialization, day, group_id: int) -> None:
+        """An assign() whose reservation is committed; reloads now count it."""
+        self._settle((_spec_key(specialization), _day_key(day)), group_id)
+
+    def release(self, specialization, day, group_id: int) -> None:
+        """Undo an assign() whose reservation was never committed."""
+        key = (_spec_key(specialization), _day_key(day))
+        if not self._settle(key, group_id):
+            return
+        # Every load, the original or a rebuilt one, includes the pending slot.
+        index = self._days.get(key)
+        if index is None or not index.load.get(group_id):
+            return
+        index.load[group_id] -= 1
+        if index.load[group_id] == self.daily_capacity - 1 and group_id in index.ratings:
+            # The group was popped when it filled up; dropping back below
+            # capacity makes it eligible again.
+            heapq.heappush(index.heap, (-index.ratings[group_id], group_id))
+
+    def invalidate(self, specialization=None) -> None:
+        """Forget cached groups/loads, for one specialization or all of them."""
+        if specialization is None:
+            self._candidates.clear()
+            self._days.clear()
+            return
+        spec = _spec_key(specialization)
+        self._candidates.pop(spec, None)
+        for key in [key for key in self._days if key[0] == spec]:
+            del self._days[key]
+
+
+assignment_engine = AssignmentEngine(
+    daily_capacity=settings.GROUP_DAILY_CAPACITY,
+    ttl_seconds=settings.ASSIGNMENT_INDEX_TTL_SECONDS
+)
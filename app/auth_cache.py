@@ -0,0 +1,81 @@
+import time
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.cache import MISSING, TTLCache
+from app.config import settings
+from app.models import User
+
+"""Caches behind token authentication.
+
+Verified token claims are cached by token, so a repeat request skips the
+signature check, and user rows are cached by username, so it also skips the
+users lookup. Cached users are plain column values; every request gets its
+own User instance built from them and attached to its session without a
+query, so no ORM object is shared between requests.
+
+A committed change to, or deletion of, a user drops that user's entry in this
+process. Changes made elsewhere (other workers, scripts) are seen once an entry
+is older than AUTH_CACHE_TTL_SECONDS, which is the bound on how stale a role
+or a deleted account can be.
+"""
+
+_claims = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+_users = TTLCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+
+def cached_username(token: str) -> Optional[str]:
+    """Subject of a previously verified, still unexpired token."""
+    claims = _claims.get(token)
+    if claims is MISSING:
+        return None
+    username, expires_at = claims
+    if expires_at is not None and expires_at <= time.time():
+        _claims.invalidate(token)
+        return None
+    return username
+
+def remember_claims(token: str, payload: dict) -> None:
+    _claims.set(token, (payload["sub"], payload.get("exp")))
+
+def cached_user(db, username: str) -> Optional[User]:
+    """A User for `username` attached to `db`, if the row is cached."""
+    values = _users.get(username)
+    if values is MISSING:
+        return None
+    user = User(**values)
+    make_transient_to_detached(user)
+    db.add(user)
+    return user
+
+def remember_user(user: User) -> None:
+    _users.set(user.username, {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+    })
+
+def invalidate_user(username: Optional[str] = None) -> None:
+    _users.invalidate(username)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_user_changes(session, flush_context):
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, User):
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        history = inspect(obj).attrs.username.history
+        usernames = session.info.setdefault("auth_invalidate", set())
+        usernames.update(history.deleted or ())
+        usernames.add(obj.username)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for username in session.info.pop("auth_invalidate", ()):
+        invalidate_user(username)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("auth_invalidate", None)
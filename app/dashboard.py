@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Group, Reservation, RoleType, User
+from app.ratings import RATING_MARKER
+from app.statistics import monthly_counts
+from app.versioning import table_versions
+
+"""Materialized admin dashboard.
+
+The admin dashboard is built from a snapshot held in memory: the counts,
+recent reservations, monthly totals and top groups are computed together by
+`build_snapshot` and served to every page view without touching the database.
+
+A background task checks the table versions (see app.versioning) every
+DASHBOARD_REFRESH_INTERVAL_SECONDS and rebuilds the
+snapshot when groups, memberships, reservations, users or group ratings
+changed, and in any
+case once it is older than DASHBOARD_MAX_AGE_SECONDS so writes that bypass the
+ORM are picked up too. The snapshot carries its build time so the page can
+show how fresh it is.
+"""
+
+DASHBOARD_TABLES = ("groups", "group_members", "reservations", "users")
+
+
+class DashboardSnapshot:
+    def __init__(self, data: dict, versions: dict):
+        self.data = data
+        self.versions = versions
+        self.refreshed_at = datetime.utcnow()
+        self._built = time.monotonic()
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self._built
+
+
+_snapshot: Optional[DashboardSnapshot] = None
+_lock = asyncio.Lock()
+
+async def _table_versions(db: AsyncSession) -> dict:
+    return await table_versions(db, DASHBOARD_TABLES, RATING_MARKER)
+
+async def build_snapshot(db: AsyncSession) -> DashboardSnapshot:
+    versions = await _table_versions(db)
+
+    counts = (await db.execute(select(
+        select(func.count(Group.id)).scalar_subquery().label("total_groups"),
+        select(func.count(User.id)).where(User.role == RoleType.MEMBER).scalar_subquery().label("total_members"),
+        select(func.count(Reservation.id)).scalar_subquery().label("total_reservations"),
+        select(func.count(User.id)).where(User.role == RoleType.CLIENT).scalar_subquery().label("total_clients")
+    ))).one()
+
+    recent_reservations = (await db.execute(
+        select(
+            Reservation.id,
+            Reservation.cleaning_type,
+            Reservation.address,
+            Reservation.cleaning_date,
+            Reservation.reservation_date,
+            Reservation.price,
+            Reservation.priority,
+            Reservation.approved_by_admin
+        )
+        .order_by(Reservation.reservation_date.desc())
+        .limit(10)
+    )).mappings().all()
+
+    top_groups = (await db.execute(
+        select(Group.id, Group.name, Group.specialization, Group.rating)
+        .order_by(Group.rating.desc())
+        .limit(5)
+    )).mappings().all()
+
+    data = {
+        **counts._asdict(),
+        "recent_reservations": [dict(row) for row in recent_reservations],
+        "monthly_stats": await monthly_counts(db),
+        "top_groups": [dict(row) for row in top_groups]
+    }
+    return DashboardSnapshot(data, versions)
+
+async def refresh_snapshot(force: bool = False) -> DashboardSnapshot:
+    """Rebuild the snapshot if its tables changed, it is too old, or `force`."""
+    global _snapshot
+    async with _lock:
+        async with AsyncSessionLocal() as db:
+            current = _snapshot
+            if current is not None and not force and current.age_seconds < settings.DASHBOARD_MAX_AGE_SECONDS:
+                if await _table_versions(db) == current.versions:
+                    return current
+            _snapshot = await build_snapshot(db)
+    return _snapshot
+
+async def get_snapshot() -> DashboardSnapshot:
+    """The current snapshot; only the very first call waits for a build."""
+    if _snapshot is not None:
+        return _snapshot
+    return await refresh_snapshot()
+
+async def run_refresher(interval_seconds: float) -> None:
+    while True:
+        try:
+            await refresh_snapshot()
+        except Exception as e:
+            logging.error(f"Error refreshing dashboard snapshot: {str(e)}", exc_info=True)
+        await asyncio.sleep(interval_seconds)
@@ -1,29 +1,18 @@
-import requests
 import pandas as pd
+from sqlalchemy.exc import SQLAlchemyError
+from app.loader import load_groups, load_reservations
 try:
-    # Configure base URL and error handling
-    BASE_URL = 'http://127.0.0.1:8001'  # Updated port to match main.py
+    # Load the groups data straight from the database
+    print("Loading groups data...")
+    groups_df = load_groups()
+    print(f"Successfully loaded {len(groups_df)} groups")
     
-    # Fetch the groups data
-    print("Fetching groups data...")
-    groups_api = requests.get(f'{BASE_URL}/groups/all')
-    groups_api.raise_for_status()
-    groups_api_data = groups_api.json()
-    print(f"Successfully fetched {len(groups_api_data)} groups")
+    # Reservations are read in chunks through a server-side cursor
+    print("Loading reservations data...")
+    reservations_df = load_reservations()
+    print(f"Successfully loaded {len(reservations_df)} reservations")
     
-    # Fetch the reservations data
-    print("Fetching reservations data...")
-    reservations_api = requests.get(f'{BASE_URL}/reservations/all')
-    reservations_api.raise_for_status()
-    reservations_api_data = reservations_api.json()
-    print(f"Successfully fetched {len(reservations_api_data)} reservations")
-    
-    # Convert the groups data into a pandas DataFrame
-    groups_df = pd.DataFrame(groups_api_data)
     print("\nGroups DataFrame:\n{}".format(groups_df))
-    
-    # Convert the reservations data into a pandas DataFrame
-    reservations_df = pd.DataFrame(reservations_api_data)
     print("\nReservations DataFrame:\n{}".format(reservations_df))
     
     # Perform different types of merges between groups and reservations
@@ -90,9 +79,9 @@ try:
         print("\nReservation count by priority:\n", 
               reservations_df.groupby('priority').size())
     
-except requests.exceptions.RequestException as e:
-    print(f"Error fetching data from API: {e}")
-    print("Please make sure the server is running on port 8001")
+except SQLAlchemyError as e:
+    print(f"Error loading data from the database: {e}")
+    print("Please make sure DATABASE_URL points to a reachable database")
 except KeyError as e:
     print(f"Error accessing DataFrame column: {e}")
     print("Available columns in groups_df:", groups_df.columns if 'groups_df' in locals() else "Not available")
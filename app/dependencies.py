@@ -1,21 +1,23 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from datetime import datetime
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User
 from app.config import settings
+from app.auth_cache import cached_username, remember_claims, cached_user, remember_user
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/login")
 
 
 """Get the current authenticated user from the JWT token"""
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -23,29 +25,38 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
+    username = cached_username(token)
+    if username is None:
+        try:
+            payload = jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM]
+            )
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+                
+        except JWTError:
             raise credentials_exception
-            
-    except JWTError:
-        raise credentials_exception
+        remember_claims(token, payload)
+    
+    user = cached_user(db, username)
+    if user is not None:
+        return user
         
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
+    remember_user(user)
         
     return user
 
 
 """Check if the current user is active"""
 
-def get_current_active_user(
+async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
     if not current_user.is_active:
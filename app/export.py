@@ -0,0 +1,202 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal
+from app.models import Reservation, Group, SpecializationType, PriorityType
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # columnar exports are optional
+    pa = None
+    pq = None
+
+"""Streaming exports backed by server-side cursors.
+
+Rows are pulled from the database `EXPORT_BATCH_SIZE` at a time and encoded one
+partition per chunk, so memory stays flat regardless of table size and the
+first chunk is sent as soon as the first partition arrives.
+
+The generators open their own session: a StreamingResponse body runs after the
+request's dependencies have been torn down.
+"""
+
+EXPORT_BATCH_SIZE = 5000
+
+RESERVATION_EXPORT_COLUMNS = (
+    Reservation.id,
+    Reservation.cleaning_type,
+    Reservation.address,
+    Reservation.house_number,
+    Reservation.cleaning_date,
+    Reservation.price,
+    Reservation.approved_by_client,
+    Reservation.approved_by_admin,
+    Reservation.priority,
+    Reservation.client_id,
+    Reservation.assigned_group_id,
+)
+
+def reservation_export_stmt():
+    return select(*RESERVATION_EXPORT_COLUMNS).order_by(Reservation.id)
+
+async def stream_partitions(stmt, batch_size: int = EXPORT_BATCH_SIZE):
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+async def ndjson_chunks(stmt):
+    async for partition in stream_partitions(stmt):
+        lines = [
+            json.dumps({key: _plain(value) for key, value in row._mapping.items()})
+            for row in partition
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+async def csv_chunks(stmt):
+    header = io.StringIO()
+    csv.writer(header).writerow(stmt.selected_columns.keys())
+    yield header.getvalue().encode()
+
+    async for partition in stream_partitions(stmt):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([_plain(value) for value in row] for row in partition)
+        yield buffer.getvalue().encode()
+
+
+"""Columnar (Arrow IPC / Parquet) exports for analytics consumers.
+
+cleaning_type, specialization and priority are dictionary encoded against the
+fixed enum value lists, so batches share one dictionary and pandas reads them
+back as categoricals. cleaning_type is a plain string column, though: a value
+outside SpecializationType is appended to that batch's dictionary (the stream
+format allows a replacement dictionary per batch) instead of becoming null.
+"""
+
+CLEANING_TYPES = [member.value for member in SpecializationType]
+PRIORITIES = [member.value for member in PriorityType]
+COLUMNAR_MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def columnar_available() -> bool:
+    return pa is not None
+
+def _categorical_type(index_type=None):
+    return pa.dictionary(index_type or pa.int8(), pa.string())
+
+def reservation_arrow_schema():
+    return pa.schema([
+        ("id", pa.int32()),
+        ("cleaning_type", _categorical_type(pa.int32())),
+        ("address", pa.string()),
+        ("house_number", pa.string()),
+        ("cleaning_date", pa.timestamp("us")),
+        ("price", pa.float64()),
+        ("approved_by_client", pa.bool_()),
+        ("approved_by_admin", pa.bool_()),
+        ("priority", _categorical_type()),
+        ("client_id", pa.int32()),
+        ("assigned_group_id", pa.int32()),
+    ])
+
+def group_arrow_schema():
+    return pa.schema([
+        ("id", pa.int32()),
+        ("name", pa.string()),
+        ("specialization", _categorical_type()),
+        ("rating", pa.float64()),
+        ("chief_id", pa.int32()),
+        ("member_ids", pa.list_(pa.int32())),
+    ])
+
+def _dictionary_array(values, categories, index_type=None):
+    plain = [_plain(value) for value in values]
+    positions = {category: index for index, category in enumerate(categories)}
+    extra = sorted({value for value in plain if value is not None and value not in positions})
+    if extra:
+        categories = list(categories) + extra
+        positions.update((value, index) for index, value in enumerate(categories))
+    indices = pa.array(
+        [positions[value] if value is not None else None for value in plain],
+        type=index_type or pa.int8()
+    )
+    return pa.DictionaryArray.from_arrays(indices, pa.array(categories, type=pa.string()))
+
+def _reservation_batch(partition, schema):
+    columns = list(zip(*partition))
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name == "cleaning_type":
+            arrays.append(_dictionary_array(values, CLEANING_TYPES, field.type.index_type))
+        elif field.name == "priority":
+            arrays.append(_dictionary_array(values, PRIORITIES))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _writer(fmt, sink, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema)
+    return pa.ipc.new_stream(sink, schema)
+
+def _write(writer, fmt, batch):
+    if fmt == "parquet":
+        writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer.write_batch(batch)
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+async def reservation_columnar_chunks(fmt: str):
+    """Yield an Arrow IPC stream or a Parquet file, one batch/row group per partition."""
+    schema = reservation_arrow_schema()
+    sink = io.BytesIO()
+    writer = _writer(fmt, sink, schema)
+    async for partition in stream_partitions(reservation_export_stmt()):
+        _write(writer, fmt, _reservation_batch(partition, schema))
+        yield _drain(sink)
+    writer.close()
+    yield _drain(sink)
+
+async def group_columnar_bytes(fmt: str) -> bytes:
+    schema = group_arrow_schema()
+    async with AsyncSessionLocal() as db:
+        groups = (await db.execute(
+            select(Group.id, Group.name, Group.specialization, Group.rating, Group.chief_id, Group.member_ids)
+            .order_by(Group.id)
+        )).all()
+
+    ids, names, specializations, ratings, chiefs, member_ids = zip(*groups) if groups else ([], [], [], [], [], [])
+    batch = pa.RecordBatch.from_arrays([
+        pa.array(ids, type=pa.int32()),
+        pa.array(names, type=pa.string()),
+        _dictionary_array(specializations, CLEANING_TYPES),
+        pa.array(ratings, type=pa.float64()),
+        pa.array(chiefs, type=pa.int32()),
+        pa.array(member_ids, type=pa.list_(pa.int32())),
+    ], schema=schema)
+
+    sink = io.BytesIO()
+    writer = _writer(fmt, sink, schema)
+    _write(writer, fmt, batch)
+    writer.close()
+    return sink.getvalue()
@@ -0,0 +1,170 @@
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.loader import empty_reservations
+from app.reports import report_name
+
+"""Out-of-core joins of reservation chunks against the groups table.
+
+Only `groups` is held in memory, as a lookup indexed by id with one all-NA
+row appended. Each reservation chunk is matched with a single
+`get_indexer` call and the group columns are gathered with `take`; a missing
+group maps to position -1, which is the NA row, so the left join needs no
+second pass and the inner join is just its matched rows. The right and outer
+joins are the inner and left joins plus the groups no chunk matched, written
+once every chunk has been seen; with no chunks at all that is every group,
+under the reservation columns of `empty_reservations()`. The cross join is
+produced in slices of at most `CROSS_BATCH_ROWS` rows.
+
+Results are appended to their CSV files chunk by chunk and their null counts
+are accumulated as they are written, so memory depends on the chunk size and
+the number of groups, not on the number of reservations. When a
+`ReportRenderer` is passed, every chunk also goes to that output's paged
+HTML report, so no CSV has to be read back. Output columns
+match `pd.merge(reservations, groups, left_on="assigned_group_id",
+right_on="id")`: the clashing `id` columns become `id_x` and `id_y`.
+"""
+
+JOIN_KINDS = ("inner", "left", "right", "outer", "cross")
+CROSS_BATCH_ROWS = 1000000
+
+class CsvOutput:
+    """A CSV file written one chunk at a time, with running row and null counts.
+
+    Chunks are also passed on to `report` (a PagedReport), if given.
+    """
+
+    def __init__(self, path: str, delimiter: str = ",", report=None):
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"Cleared existing data in '{path}'")
+        self.path = path
+        self.delimiter = delimiter
+        self.rows = 0
+        self.nulls: Optional[pd.Series] = None
+        self.report = report
+        self._file = None
+
+    def append(self, frame: pd.DataFrame, text: str, nulls: pd.Series) -> None:
+        if self._file is None:
+            self._file = open(self.path, "w", newline="")
+            self._file.write(frame.iloc[:0].to_csv(index=False, sep=self.delimiter))
+        self._file.write(text)
+        self.rows += len(frame)
+        self.nulls = nulls if self.nulls is None else self.nulls.add(nulls, fill_value=0)
+        if self.report is not None:
+            self.report.write(frame)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        write_chunk(frame, [self])
+
+    def close(self) -> None:
+        if self._file is None:
+            # Nothing matched: still leave a file behind, like an empty DataFrame.to_csv would.
+            self._file = open(self.path, "w", newline="")
+        self._file.close()
+        if self.report is not None:
+            self.report.close()
+
+def write_chunk(frame: pd.DataFrame, outputs) -> None:
+    """Format `frame` and count its nulls once, then append it to every output."""
+    if not outputs:
+        return
+    text = frame.to_csv(index=False, header=False, sep=outputs[0].delimiter)
+    nulls = frame.isna().sum()
+    for output in outputs:
+        output.append(frame, text, nulls)
+
+class GroupLookup:
+    def __init__(self, groups: pd.DataFrame):
+        self.index = pd.Index(groups["id"])
+        rows = groups.reset_index(drop=True)
+        # Plain numpy ints and bools cannot hold the NA row; their nullable
+        # counterparts keep ids printing as integers.
+        rows = rows.astype({
+            name: "boolean" if dtype == bool else dtype.name.capitalize()
+            for name, dtype in rows.dtypes.items()
+            if isinstance(dtype, np.dtype) and dtype.kind in "iub"
+        })
+        self.rows = rows.reindex(range(len(rows) + 1))
+        self.size = len(rows)
+
+    def positions(self, keys) -> np.ndarray:
+        return self.index.get_indexer(keys)
+
+def _combine(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    clashing = set(left.columns) & set(right.columns)
+    left = left.reset_index(drop=True).rename(columns={name: f"{name}_x" for name in clashing})
+    right = right.reset_index(drop=True).rename(columns={name: f"{name}_y" for name in clashing})
+    return pd.concat([left, right], axis=1)
+
+def _cross_slices(chunk: pd.DataFrame, lookup: GroupLookup, batch_rows: int):
+    if not lookup.size:
+        return
+    step = max(1, batch_rows // lookup.size)
+    groups = lookup.rows.iloc[:lookup.size]
+    for start in range(0, len(chunk), step):
+        part = chunk.iloc[start:start + step]
+        yield _combine(
+            part.take(np.repeat(np.arange(len(part)), lookup.size)),
+            groups.take(np.tile(np.arange(lookup.size), len(part)))
+        )
+
+def stream_joins(
+    reservation_chunks: Iterable[pd.DataFrame],
+    groups: pd.DataFrame,
+    paths: Dict[str, str],
+    delimiter: str = ",",
+    cross_batch_rows: int = CROSS_BATCH_ROWS,
+    reports=None,
+) -> Dict[str, CsvOutput]:
+    """Join every chunk with `groups` on assigned_group_id and write the results.
+
+    `paths` maps a join kind from JOIN_KINDS to its CSV file; kinds that are
+    left out are not computed. With `reports` (a ReportRenderer), each join
+    except the cross join also gets a paged HTML report named after its CSV.
+    Returns the closed outputs by kind.
+    """
+    unknown = set(paths) - set(JOIN_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown join kinds: {', '.join(sorted(unknown))}")
+
+    outputs = {
+        kind: CsvOutput(
+            path, delimiter,
+            reports.paged(report_name(path)) if reports is not None and kind != "cross" else None
+        )
+        for kind, path in paths.items()
+    }
+    matched_outputs = [outputs[kind] for kind in ("inner", "right") if kind in outputs]
+    all_outputs = [outputs[kind] for kind in ("left", "outer") if kind in outputs]
+
+    lookup = GroupLookup(groups)
+    matched = np.zeros(lookup.size, dtype=bool)
+    template = empty_reservations()
+    try:
+        for chunk in reservation_chunks:
+            template = chunk.iloc[:0]
+            positions = lookup.positions(chunk["assigned_group_id"])
+            found = positions >= 0
+            matched[positions[found]] = True
+
+            joined = _combine(chunk, lookup.rows.take(positions))
+            write_chunk(joined, all_outputs)
+            write_chunk(joined[found], matched_outputs)
+
+            if "cross" in outputs:
+                for part in _cross_slices(chunk, lookup, cross_batch_rows):
+                    outputs["cross"].write(part)
+
+        unmatched_outputs = [outputs[kind] for kind in ("right", "outer") if kind in outputs]
+        if unmatched_outputs and not matched.all():
+            unmatched = lookup.rows.iloc[:lookup.size][~matched]
+            write_chunk(_combine(template.reindex(range(len(unmatched))), unmatched), unmatched_outputs)
+    finally:
+        for output in outputs.values():
+            output.close()
+    return outputs
@@ -0,0 +1,166 @@
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func, String
+
+from app.database import engine
+from app.export import RESERVATION_EXPORT_COLUMNS, CLEANING_TYPES, PRIORITIES
+from app.models import Reservation, Group, SpecializationType, PriorityType
+
+"""Loads reservations and groups straight from the database into pandas.
+
+Analytics scripts used to pull the Arrow exports over HTTP, which needed a
+running API and paid for encoding and decoding every row. These helpers read
+through a server-side cursor on the sync engine instead, `LOAD_BATCH_SIZE`
+rows at a time, and convert each partition column-wise into compact dtypes:
+int32 ids (nullable Int32 where the column allows NULL), float32 prices and
+ratings, and categoricals over the fixed enum value lists for cleaning_type,
+specialization and priority. Every chunk shares the same categories, so
+chunks concatenate without falling back to object columns.
+
+Enum columns are read as their stored member names and mapped to the enum
+values once per chunk, not once per row. cleaning_type is a plain string
+column, so a value outside the enum is appended to the categories of its
+chunk instead of being read as NaN; `load_reservations()` widens every chunk
+to the same categories before concatenating them.
+
+    from app.loader import load_groups, load_reservations
+
+    groups = load_groups()
+    for chunk in load_reservations(chunk_size=250000):
+        ...
+"""
+
+LOAD_BATCH_SIZE = 100000
+
+# Enum columns store member names; the frames expose the values, like the exports.
+PRIORITY_NAMES = [member.name for member in PriorityType]
+SPECIALIZATION_NAMES = [member.name for member in SpecializationType]
+
+RESERVATION_LOAD_COLUMNS = tuple(
+    column.cast(String).label(column.key) if column is Reservation.priority else column
+    for column in RESERVATION_EXPORT_COLUMNS
+)
+
+def reservation_load_stmt():
+    return select(*RESERVATION_LOAD_COLUMNS).order_by(Reservation.id)
+
+def _enum_categorical(names, stored, values) -> pd.Categorical:
+    return pd.Categorical(names, categories=stored).rename_categories(values)
+
+def _cleaning_type_categorical(values) -> pd.Categorical:
+    extra = sorted({value for value in values if value is not None} - set(CLEANING_TYPES))
+    return pd.Categorical(values, categories=list(CLEANING_TYPES) + extra)
+
+def _reservation_frame(partition) -> pd.DataFrame:
+    keys = [column.key for column in RESERVATION_LOAD_COLUMNS]
+    columns = dict(zip(keys, zip(*partition))) if partition else {key: () for key in keys}
+    return pd.DataFrame({
+        "id": np.array(columns["id"], dtype=np.int32),
+        "cleaning_type": _cleaning_type_categorical(columns["cleaning_type"]),
+        "address": pd.array(columns["address"], dtype="string"),
+        "house_number": pd.array(columns["house_number"], dtype="string"),
+        "cleaning_date": np.array(columns["cleaning_date"], dtype="datetime64[us]"),
+        "price": np.array(columns["price"], dtype=np.float32),
+        "approved_by_client": pd.array(columns["approved_by_client"], dtype="boolean"),
+        "approved_by_admin": pd.array(columns["approved_by_admin"], dtype="boolean"),
+        "priority": _enum_categorical(columns["priority"], PRIORITY_NAMES, PRIORITIES),
+        "client_id": pd.array(columns["client_id"], dtype="Int32"),
+        "assigned_group_id": pd.array(columns["assigned_group_id"], dtype="Int32"),
+    })
+
+def iter_reservation_frames(chunk_size: int = LOAD_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield reservations ordered by id as DataFrames of at most `chunk_size` rows."""
+    with engine.connect() as connection:
+        result = connection.execute(reservation_load_stmt().execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            yield _reservation_frame(partition)
+
+def load_reservations(chunk_size: Optional[int] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """The whole reservations table, or an iterator of chunks when `chunk_size` is given."""
+    if chunk_size is not None:
+        return iter_reservation_frames(chunk_size)
+    frames = list(iter_reservation_frames())
+    if not frames:
+        return empty_reservations()
+    categories = list(dict.fromkeys(
+        category for frame in frames for category in frame["cleaning_type"].cat.categories
+    ))
+    for frame in frames:
+        frame["cleaning_type"] = frame["cleaning_type"].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def empty_reservations() -> pd.DataFrame:
+    """A reservations frame with no rows but every column and dtype of a loaded one."""
+    return _reservation_frame([])
+
+def load_groups() -> pd.DataFrame:
+    with engine.connect() as connection:
+        groups = connection.execute(
+            select(
+                Group.id,
+                Group.name,
+                Group.specialization.cast(String),
+                Group.rating,
+                Group.chief_id,
+                Group.member_ids.expression,
+            ).order_by(Group.id)
+        ).all()
+
+    ids, names, specializations, ratings, chiefs, member_ids = zip(*groups) if groups else ([], [], [], [], [], [])
+    return pd.DataFrame({
+        "id": np.array(ids, dtype=np.int32),
+        "name": pd.array(names, dtype="string"),
+        "specialization": _enum_categorical(specializations, SPECIALIZATION_NAMES, CLEANING_TYPES),
+        "rating": np.array(ratings, dtype=np.float32),
+        "chief_id": pd.array(chiefs, dtype="Int32"),
+        "member_ids": pd.Series(member_ids, dtype=object),
+    })
+
+
+"""Reservation summaries computed by Postgres, for jobs that stream the table
+instead of holding it in memory."""
+
+def reservation_price_summary() -> pd.Series:
+    """The statistics of `Series.describe()` for reservations.price."""
+    price = Reservation.price
+    quartiles = [
+        func.percentile_cont(fraction).within_group(price)
+        for fraction in (0.25, 0.5, 0.75)
+    ]
+    with engine.connect() as connection:
+        row = connection.execute(select(
+            func.count(price), func.avg(price), func.stddev_samp(price), func.min(price),
+            *quartiles, func.max(price)
+        )).one()
+    return pd.Series(
+        [np.nan if value is None else float(value) for value in row],
+        index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+        name="price"
+    )
+
+def average_price_by_cleaning_type() -> pd.DataFrame:
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(Reservation.cleaning_type, func.avg(Reservation.price))
+            .where(Reservation.cleaning_type.isnot(None))
+            .group_by(Reservation.cleaning_type)
+        ).all()
+    frame = pd.DataFrame(rows, columns=["cleaning_type", "price"])
+    frame["cleaning_type"] = _cleaning_type_categorical(frame["cleaning_type"])
+    return frame.sort_values("cleaning_type", ignore_index=True)
+
+def reservation_count_by_priority() -> pd.DataFrame:
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(Reservation.priority.cast(String), func.count())
+            .where(Reservation.priority.isnot(None))
+            .group_by(Reservation.priority)
+        ).all()
+    names, counts = zip(*rows) if rows else ([], [])
+    frame = pd.DataFrame({
+        "priority": _enum_categorical(names, PRIORITY_NAMES, PRIORITIES),
+        "count": np.array(counts, dtype=np.int64),
+    })
+    return frame.sort_values("priority", ignore_index=True)
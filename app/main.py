@@ -1,14 +1,59 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from app.routes import users, groups, reservations
-from app.database import Base, engine
+from app.routes import users, groups, reservations, tasks
+from app.database import Base, engine, pool_statistics
+from app.config import settings
+from app.middleware import CompressionMiddleware, AdmissionMiddleware
+from app.admission import admission_store
+from app import versioning  # registers the table version flush listener
+from app import rollups  # registers the daily rollup flush listener
+from app import task_status  # registers the task counter flush listener
+from app import ratings
+from app import dashboard
+from app import passwords
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = [
+        asyncio.create_task(dashboard.run_refresher(settings.DASHBOARD_REFRESH_INTERVAL_SECONDS)),
+        asyncio.create_task(versioning.run_compactor(settings.TABLE_CHANGES_COMPACT_INTERVAL_SECONDS))
+    ]
+    if ratings.batch_mode():
+        background_tasks.append(asyncio.create_task(
+            ratings.run_aggregator(settings.RATING_AGGREGATION_INTERVAL_SECONDS)
+        ))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    passwords.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL
+)
+
+# Added last so it runs first: rejected requests cost no compression work.
+app.add_middleware(
+    AdmissionMiddleware,
+    store=admission_store,
+    rate=settings.RATE_LIMIT_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    exempt_paths=["/health/pool", "/health/admission"]
+)
 
 Base.metadata.create_all(bind=engine)
 
 app.include_router(users.router)
 app.include_router(groups.router)
 app.include_router(reservations.router)
+app.include_router(tasks.router)
 
 @app.get("/")
 async def root():
@@ -19,4 +64,12 @@ async def root():
             "swagger": "/docs",
             "redoc": "/redoc"
         }
-    }
\ No newline at end of file
+    }
+
+@app.get("/health/pool")
+async def pool_health():
+    return pool_statistics()
+
+@app.get("/health/admission")
+async def admission_health():
+    return await admission_store.snapshot()
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Boolean, Date, DECIMAL, DateTime, func, Table, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Integer, BigInteger, Float, ForeignKey, Boolean, Date, DECIMAL, DateTime, func, Table, Enum, select, literal_column, Index
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import relationship, column_property
 from .database import Base
 import enum
 
@@ -14,6 +15,11 @@ class PriorityType(str, enum.Enum):
     MEDIUM = "Medium"
     LOW = "Low"
 
+class TaskStatus(str, enum.Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
 class SpecializationType(str, enum.Enum):
     SALON = "Salon Cleaning"
     KITCHEN = "Kitchen Cleaning"
@@ -27,7 +33,7 @@ group_members = Table(
     'group_members',
     Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id')),
-    Column('group_id', Integer, ForeignKey('groups.id'))
+    Column('group_id', Integer, ForeignKey('groups.id'), index=True)
 )
 
 
@@ -49,8 +55,23 @@ class Group(Base):
     name = Column(String, unique=True)
     specialization = Column(Enum(SpecializationType))
     rating = Column(Float, default=0.0)
+    rating_sum = Column(Float, nullable=False, default=0.0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
     chief_id = Column(Integer, ForeignKey("users.id"))
 
+    # Loaded in the same SELECT as the group through a correlated array_agg,
+    # so listing N groups never issues one membership query per group.
+    member_ids = column_property(
+        select(
+            func.coalesce(
+                func.array_agg(aggregate_order_by(group_members.c.user_id, group_members.c.user_id)),
+                literal_column("'{}'::integer[]")
+            )
+        )
+        .where(group_members.c.group_id == id)
+        .scalar_subquery()
+    )
+
     chief = relationship("User", back_populates="group_as_chief")
     members = relationship("User", secondary=group_members, back_populates="group_members")
     reservations = relationship("Reservation", back_populates="assigned_group")
@@ -62,14 +83,78 @@ class Reservation(Base):
     cleaning_type = Column(String)
     address = Column(String)
     house_number = Column(String)
-    cleaning_date = Column(DateTime)
+    cleaning_date = Column(DateTime, nullable=False, index=True)
     reservation_date = Column(DateTime, default=func.now())
     price = Column(Float)
     approved_by_client = Column(Boolean, default=False)
     approved_by_admin = Column(Boolean, default=False)
-    priority = Column(Enum(PriorityType), default=PriorityType.MEDIUM)
+    priority = Column(Enum(PriorityType), nullable=False, default=PriorityType.MEDIUM)
+    status = Column(Enum(TaskStatus), nullable=False, default=TaskStatus.PENDING, server_default=TaskStatus.PENDING.name)
+    notes = Column(String, nullable=True)
     client_id = Column(Integer, ForeignKey('users.id'))
     assigned_group_id = Column(Integer, ForeignKey('groups.id'), nullable=True)
     
     client = relationship("User", back_populates="reservations")
     assigned_group = relationship("Group", back_populates="reservations")
+
+    # Most task lookups are for work that is still open; completed tasks are
+    # the bulk of the table and stay out of this index.
+    __table_args__ = (
+        Index(
+            "ix_reservations_active_status",
+            "assigned_group_id",
+            "status",
+            postgresql_where=status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])
+        ),
+    )
+
+class Rating(Base):
+    __tablename__ = "ratings"
+
+    id = Column(Integer, primary_key=True, index=True)
+    group_id = Column(Integer, ForeignKey("groups.id"), nullable=False, index=True)
+    reservation_id = Column(Integer, ForeignKey("reservations.id"), nullable=False, unique=True)
+    client_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    score = Column(Integer, nullable=False)
+    aggregated = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index(
+            "ix_ratings_pending",
+            "group_id",
+            postgresql_where=(aggregated == False)
+        ),
+    )
+
+class ReservationDailyRollup(Base):
+    """Reservation counts and revenue per day and dimension combination.
+
+    Unassigned groups are stored as 0, missing cleaning types and priorities
+    as '' so the key can be a primary key.
+    """
+    __tablename__ = "reservation_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    assigned_group_id = Column(Integer, primary_key=True)
+    cleaning_type = Column(String, primary_key=True)
+    priority = Column(String, primary_key=True)
+    approved = Column(Boolean, primary_key=True)
+    reservation_count = Column(BigInteger, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+class GroupTaskCounter(Base):
+    """Number of tasks per group and status; group 0 holds unassigned tasks."""
+    __tablename__ = "group_task_counters"
+
+    group_id = Column(Integer, primary_key=True)
+    status = Column(String, primary_key=True)
+    task_count = Column(BigInteger, nullable=False, default=0)
+
+class TableChange(Base):
+    """Append-only change log; a table's version is the sum of its weights."""
+    __tablename__ = "table_changes"
+
+    id = Column(BigInteger, primary_key=True)
+    table_name = Column(String, nullable=False, index=True)
+    weight = Column(BigInteger, nullable=False, default=1, server_default="1")
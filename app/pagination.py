@@ -0,0 +1,121 @@
+import base64
+import binascii
+import enum
+import json
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, Date, DateTime, Enum as SAEnum
+from sqlalchemy.ext.asyncio import AsyncSession
+
+"""Keyset (cursor) pagination shared by the list endpoints.
+
+A page is addressed by the sort-key values of the last row of the previous
+page instead of an OFFSET, so fetching page N costs the same index range scan
+as fetching page 1. The sort order must end with a unique column (the primary
+key) to break ties, and the sort columns must be NOT NULL: `col > NULL` is
+never true, so a NULL key would end the listing early.
+
+Cursors are opaque to clients: urlsafe base64 of a small JSON document that
+carries the key names, so a cursor issued by one endpoint is rejected by an
+endpoint that sorts differently.
+"""
+
+SortKey = Tuple[Any, bool]
+
+def ascending(column) -> SortKey:
+    return (column, False)
+
+def descending(column) -> SortKey:
+    return (column, True)
+
+
+def _encode_value(value):
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _decode_value(column, raw):
+    if raw is None:
+        return None
+    column_type = column.type
+    if isinstance(column_type, SAEnum) and column_type.enum_class is not None:
+        return column_type.enum_class[raw]
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat(raw)
+    if isinstance(column_type, Date):
+        return date.fromisoformat(raw)
+    return raw
+
+def encode_cursor(keys: Sequence[SortKey], values: Sequence[Any]) -> str:
+    payload = {
+        "k": [column.key for column, _ in keys],
+        "v": [_encode_value(value) for value in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(keys: Sequence[SortKey], cursor: str) -> List[Any]:
+    invalid = HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        names, raw_values = payload["k"], payload["v"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise invalid
+
+    if names != [column.key for column, _ in keys] or len(raw_values) != len(keys):
+        raise invalid
+    try:
+        return [_decode_value(column, raw) for (column, _), raw in zip(keys, raw_values)]
+    except (KeyError, ValueError, TypeError):
+        raise invalid
+
+
+def keyset_order(keys: Sequence[SortKey]) -> list:
+    return [column.desc() if desc else column.asc() for column, desc in keys]
+
+def keyset_filter(keys: Sequence[SortKey], values: Sequence[Any]):
+    """Rows strictly after `values` in the given order.
+
+    Expanded to (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... so that mixed
+    ascending/descending keys work; each branch is an index-friendly range.
+    """
+    branches = []
+    for i, (column, desc) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        beyond = column < values[i] if desc else column > values[i]
+        branches.append(and_(*equal_prefix, beyond))
+    return or_(*branches)
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt,
+    keys: Sequence[SortKey],
+    cursor: Optional[str],
+    limit: int,
+    scalars: bool = True
+) -> dict:
+    """Run `stmt` for one page and return {"items": [...], "next_cursor": ...}.
+
+    `stmt` must not carry its own ORDER BY or LIMIT. With `scalars` the
+    first column of each row is returned (ORM entities), otherwise the rows.
+    """
+    if cursor:
+        stmt = stmt.where(keyset_filter(keys, decode_cursor(keys, cursor)))
+    stmt = stmt.order_by(*keyset_order(keys)).limit(limit + 1)
+
+    result = await db.execute(stmt)
+    items = result.scalars().all() if scalars else result.all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(keys, [getattr(last, column.key) for column, _ in keys])
+
+    return {"items": items, "next_cursor": next_cursor}
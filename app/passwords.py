@@ -0,0 +1,70 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+"""bcrypt hashing off the event loop.
+
+Hashing and verifying a password costs tens to hundreds of milliseconds of
+CPU, so both run in a dedicated process pool of PASSWORD_HASH_WORKERS
+processes instead of on the worker serving requests. At most
+PASSWORD_HASH_MAX_PENDING calls may be running or queued; beyond that
+PasswordHasherBusy is raised right away so a burst of logins is turned
+away quickly rather than piling up behind the pool.
+"""
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(password: str, password_hash: str) -> bool:
+    return pwd_context.verify(password, password_hash)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: the workers only need passlib, not a copy of this process's
+        # event loop, threads and open database connections.
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+async def _submit(fn, *args):
+    global _pending
+    if _pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        raise PasswordHasherBusy()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool(), fn, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password(password: str) -> str:
+    return await _submit(_hash, password)
+
+async def verify_password(password: str, password_hash: Optional[str]) -> bool:
+    if not password_hash:
+        return False
+    return await _submit(_verify, password, password_hash)
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
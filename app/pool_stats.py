@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+from sqlalchemy import exc
+
+"""Connection pool instrumentation.
+
+Every engine gets its own QueuePool subclass whose checkout path is timed. A
+checkout counts as a wait when the pool had no idle connection and no overflow
+headroom left, i.e. the caller had to block until someone returned one. That
+separates pool exhaustion from slow SQL when looking at latency spikes.
+"""
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_checkout(self, waited: bool, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            if not timed_out:
+                self.checkouts += 1
+            else:
+                self.timeouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_time_total += elapsed
+                self.wait_time_max = max(self.wait_time_max, elapsed)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "pid": os.getpid(),
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "wait_time_total_ms": round(self.wait_time_total * 1000, 3),
+                "wait_time_avg_ms": round(self.wait_time_total * 1000 / self.waits, 3) if self.waits else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+
+
+def instrumented_pool_class(base, stats: PoolStats):
+    """Return a subclass of `base` (a QueuePool flavour) reporting into `stats`.
+
+    The stats live on the class rather than the instance so they survive
+    engine.dispose(), which recreates the pool from the same class.
+    """
+
+    class InstrumentedPool(base):
+        def _do_get(self):
+            exhausted = self.checkedin() == 0 and (
+                self._max_overflow > -1 and self.overflow() >= self._max_overflow
+            )
+            started = time.perf_counter()
+            try:
+                conn = super()._do_get()
+            except exc.TimeoutError:
+                stats.record_checkout(exhausted, time.perf_counter() - started, timed_out=True)
+                raise
+            stats.record_checkout(exhausted, time.perf_counter() - started)
+            return conn
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    InstrumentedPool.stats = stats
+    return InstrumentedPool
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.assignment import assignment_engine
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Group, Rating, Reservation
+
+"""Group ratings: an append-only `ratings` log plus running aggregates.
+
+Each rating is inserted into `ratings`; the group keeps rating_sum and
+rating_count, and `rating` is their mean. In "immediate" mode the aggregates
+are bumped by one atomic UPDATE per rating (no read-modify-write in Python, so
+concurrent ratings cannot lose updates). In "batch" mode ratings are only
+appended and a background task folds all pending rows into the groups with a
+single statement, so heavy rating traffic does not queue on group row locks.
+
+Ratings do not bump the groups version: that would append to table_changes on
+every rating for a table whose other columns rarely change. Group ETags
+include RATING_MARKER instead, the total rating_count over all groups, read
+in the same query as the versions. Every folded rating increments it.
+"""
+
+RATING_MARKER = {"ratings": select(func.sum(Group.rating_count)).scalar_subquery()}
+
+# Marks the pending ratings as aggregated and applies their per-group totals in
+# one statement; concurrent runs cannot fold the same rating twice because the
+# second waits on the row locks and then skips rows that are no longer pending.
+AGGREGATE_PENDING_RATINGS = text("""
+    WITH folded AS (
+        UPDATE ratings SET aggregated = true
+        WHERE aggregated = false
+        RETURNING group_id, score
+    ), totals AS (
+        SELECT group_id, SUM(score) AS score_sum, COUNT(*) AS score_count
+        FROM folded
+        GROUP BY group_id
+    )
+    UPDATE groups
+    SET rating_sum = groups.rating_sum + totals.score_sum,
+        rating_count = groups.rating_count + totals.score_count,
+        rating = (groups.rating_sum + totals.score_sum) / (groups.rating_count + totals.score_count)
+    FROM totals
+    WHERE groups.id = totals.group_id
+    RETURNING groups.id
+""")
+
+def batch_mode() -> bool:
+    return settings.RATING_AGGREGATION_MODE == "batch"
+
+async def record_rating(db: AsyncSession, reservation: Reservation, client_id: int, score: int) -> None:
+    """Append a rating and, unless batching, fold it into the group right away.
+
+    Raises IntegrityError if the reservation was already rated.
+    """
+    immediate = not batch_mode()
+    db.add(Rating(
+        group_id=reservation.assigned_group_id,
+        reservation_id=reservation.id,
+        client_id=client_id,
+        score=score,
+        aggregated=immediate
+    ))
+    await db.flush()
+
+    if immediate:
+        result = await db.execute(
+            update(Group)
+            .where(Group.id == reservation.assigned_group_id)
+            .values(
+                rating_sum=Group.rating_sum + score,
+                rating_count=Group.rating_count + 1,
+                rating=(Group.rating_sum + score) / (Group.rating_count + 1)
+            )
+            .returning(Group.specialization)
+            .execution_options(synchronize_session=False)
+        )
+        specialization = result.scalar_one()
+        await db.commit()
+        assignment_engine.invalidate(specialization)
+    else:
+        await db.commit()
+
+async def aggregate_pending_ratings(db: AsyncSession) -> int:
+    """Fold every pending rating into its group; returns the number of groups updated."""
+    result = await db.execute(AGGREGATE_PENDING_RATINGS)
+    updated = len(result.all())
+    await db.commit()
+    if updated:
+        assignment_engine.invalidate()
+    return updated
+
+async def run_aggregator(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                await aggregate_pending_ratings(db)
+        except Exception as e:
+            logging.error(f"Error aggregating ratings: {str(e)}", exc_info=True)
@@ -0,0 +1,176 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Optional
+
+import pandas as pd
+
+"""HTML reports rendered straight from DataFrames.
+
+Reports used to be produced by writing a CSV, reading it back, and turning
+the whole thing into one HTML table. A report is now rendered from the
+frame that is already in memory, or from the chunks of a streamed result,
+`REPORT_PAGE_ROWS` rows per page. A report that fits on one page is written
+to `<name>_table_with_borders.html` exactly as before; a longer one continues
+in `<name>_table_with_borders_page2.html` and so on, with previous/next links
+on every page.
+
+In-memory reports drop duplicate rows first, as the CSV-based reports did.
+Streamed reports are written as they arrive and are not deduplicated.
+
+Pages are independent files, so each one is rendered by a process pool.
+At most `max_pending` pages are queued, which keeps memory bounded when a
+large streamed result produces pages faster than the pool renders them.
+"""
+
+REPORT_PAGE_ROWS = 5000
+
+def report_name(path: str) -> str:
+    """'inner_join.csv' -> 'inner_join'"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+def page_path(name: str, page: int, directory: str = ".") -> str:
+    suffix = "" if page == 1 else f"_page{page}"
+    return os.path.join(directory, f"{name}_table_with_borders{suffix}.html")
+
+def _navigation(name: str, page: int, last: bool) -> str:
+    links = []
+    if page > 1:
+        links.append(f'<a href="{os.path.basename(page_path(name, page - 1))}">Previous</a>')
+    links.append(f"Page {page}")
+    if not last:
+        links.append(f'<a href="{os.path.basename(page_path(name, page + 1))}">Next</a>')
+    return f"<p>{' | '.join(links)}</p>\n"
+
+def drop_duplicate_rows(frame: pd.DataFrame) -> pd.DataFrame:
+    """`frame.drop_duplicates()`, comparing object cells (e.g. member_ids lists) by their text."""
+    keys = frame.astype({column: str for column, dtype in frame.dtypes.items() if dtype == object})
+    return frame[~keys.duplicated()]
+
+def render_page(frame: pd.DataFrame, name: str, page: int, last: bool, directory: str = ".") -> str:
+    """Write one page of a report and return its path."""
+    # float32 columns (prices, ratings) print at their shortest round-trip form
+    # instead of six decimals of binary noise.
+    formatters = {column: str for column, dtype in frame.dtypes.items() if dtype == "float32"}
+    html = frame.to_html(border=1, index=False, formatters=formatters)
+    if page > 1 or not last:
+        navigation = _navigation(name, page, last)
+        html = navigation + html + "\n" + navigation
+    path = page_path(name, page, directory)
+    with open(path, "w") as f:
+        f.write(html)
+    return path
+
+
+class PagedReport:
+    """Cuts a stream of chunks into pages and hands them to the renderer.
+
+    A full page is only sent once a row beyond it has arrived, so every page
+    knows whether it is the last one.
+    """
+
+    def __init__(self, renderer: "ReportRenderer", name: str):
+        self.renderer = renderer
+        self.name = name
+        self.page = 0
+        self.rows = 0
+        self._chunks = []
+        self._buffered = 0
+        self._template: Optional[pd.DataFrame] = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self._template is None:
+            self._template = frame.iloc[:0]
+        if frame.empty:
+            return
+        self._chunks.append(frame)
+        self._buffered += len(frame)
+        self.rows += len(frame)
+        page_rows = self.renderer.page_rows
+        if self._buffered > page_rows:
+            buffered = pd.concat(self._chunks, ignore_index=True)
+            full = (len(buffered) - 1) // page_rows * page_rows
+            for start in range(0, full, page_rows):
+                self._send(buffered.iloc[start:start + page_rows], last=False)
+            rest = buffered.iloc[full:]
+            self._chunks = [rest]
+            self._buffered = len(rest)
+
+    def close(self) -> None:
+        if self._chunks:
+            rest = pd.concat(self._chunks, ignore_index=True)
+        elif self._template is not None:
+            rest = self._template
+        else:
+            rest = pd.DataFrame()
+        self._send(rest, last=True)
+        self._chunks = []
+        self._buffered = 0
+
+    def _send(self, frame: pd.DataFrame, last: bool) -> None:
+        self.page += 1
+        self.renderer.submit(frame, self.name, self.page, last)
+
+
+class ReportRenderer:
+    """Renders report pages across a process pool; use as a context manager."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        page_rows: int = REPORT_PAGE_ROWS,
+        directory: str = ".",
+        max_pending: Optional[int] = None,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.page_rows = page_rows
+        self.directory = directory
+        self.max_pending = max_pending or 2 * self.workers
+        self.paths = []
+        self._pending = set()
+        # spawn: the workers only need pandas, not a copy of this process's
+        # database connections.
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def paged(self, name: str) -> PagedReport:
+        return PagedReport(self, name)
+
+    def render(self, frame: pd.DataFrame, name: str) -> None:
+        """Queue a report for a DataFrame that is already in memory, without duplicate rows."""
+        report = self.paged(name)
+        report.write(drop_duplicate_rows(frame))
+        report.close()
+
+    def submit(self, frame: pd.DataFrame, name: str, page: int, last: bool) -> None:
+        while len(self._pending) >= self.max_pending:
+            done, self._pending = wait(self._pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+        self._pending.add(self._executor.submit(render_page, frame, name, page, last, self.directory))
+
+    def close(self) -> list:
+        """Wait for every queued page; returns the written paths."""
+        try:
+            done, _ = wait(self._pending)
+            self._pending = set()
+            self._collect(done)
+        finally:
+            self._executor.shutdown()
+        return self.paths
+
+    def _collect(self, done) -> None:
+        for future in done:
+            path = future.result()
+            self.paths.append(path)
+            print(f"HTML table with borders has been written to '{path}'.")
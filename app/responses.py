@@ -0,0 +1,38 @@
+from typing import Any, Iterable, Optional
+
+import orjson
+from fastapi import Response
+
+"""Fast JSON path for bulk list endpoints.
+
+Returning a Response instance makes FastAPI skip response_model validation and
+re-serialization, while the response_model declared on the route still
+documents the payload in OpenAPI. Rows go straight from SQLAlchemy Row tuples
+to dicts and are encoded by orjson, which handles datetimes and str enums
+natively. Only use it where the query already guarantees the schema, and
+only when the client asks for it (`?fast=true`); the validated path stays the
+default.
+"""
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+def rows_to_dicts(rows: Iterable) -> list:
+    rows = list(rows)
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+def fast_page_response(
+    rows: Iterable,
+    next_cursor: Optional[str] = None,
+    headers: Optional[dict] = None
+) -> FastJSONResponse:
+    return FastJSONResponse({"items": rows_to_dicts(rows), "next_cursor": next_cursor}, headers=headers)
+
+def fast_list_response(items: list, headers: Optional[dict] = None) -> FastJSONResponse:
+    return FastJSONResponse(items, headers=headers)
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import Date, String, cast, delete, event, false, func, inspect, insert, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import Reservation, ReservationDailyRollup
+
+"""Incrementally maintained daily reservation rollups.
+
+`reservation_daily_rollups` holds a count and revenue per (day, group,
+cleaning type, priority, admin approval). An after_flush listener turns every
+inserted, updated or deleted Reservation into +/- deltas on the affected keys
+and applies them with upserts in the same transaction, so the rollups are
+always consistent with committed reservations written through the ORM.
+
+Bulk loads that bypass the ORM (COPY, bulk_save_objects, raw SQL) must be
+followed by `rebuild_rollups`, e.g. `python -m app.Scripts.rebuild_rollups`.
+"""
+
+ROLLUP_ATTRIBUTES = ("cleaning_date", "assigned_group_id", "cleaning_type", "priority", "approved_by_admin", "price")
+
+def _key(cleaning_date, assigned_group_id, cleaning_type, priority, approved_by_admin):
+    if cleaning_date is None:
+        return None
+    day = cleaning_date.date() if isinstance(cleaning_date, datetime) else cleaning_date
+    return (
+        day,
+        assigned_group_id or 0,
+        getattr(cleaning_type, "value", cleaning_type) or "",
+        getattr(priority, "name", priority) or "",
+        bool(approved_by_admin),
+    )
+
+def _current(obj):
+    values = {name: getattr(obj, name) for name in ROLLUP_ATTRIBUTES}
+    return _key(*(values[name] for name in ROLLUP_ATTRIBUTES[:-1])), values["price"] or 0.0
+
+def _previous(obj):
+    state = inspect(obj)
+    values = {}
+    for name in ROLLUP_ATTRIBUTES:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            values[name] = getattr(obj, name)
+    return _key(*(values[name] for name in ROLLUP_ATTRIBUTES[:-1])), values["price"] or 0.0
+
+def _changed(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in ROLLUP_ATTRIBUTES)
+
+def collect_deltas(session: Session) -> dict:
+    deltas = defaultdict(lambda: [0, 0.0])
+
+    def add(key, count, revenue):
+        if key is None:
+            return
+        deltas[key][0] += count
+        deltas[key][1] += revenue
+
+    for obj in session.new:
+        if isinstance(obj, Reservation):
+            key, price = _current(obj)
+            add(key, 1, price)
+    for obj in session.deleted:
+        if isinstance(obj, Reservation):
+            key, price = _previous(obj)
+            add(key, -1, -price)
+    for obj in session.dirty:
+        if isinstance(obj, Reservation) and obj not in session.deleted and _changed(obj):
+            old_key, old_price = _previous(obj)
+            new_key, new_price = _current(obj)
+            add(old_key, -1, -old_price)
+            add(new_key, 1, new_price)
+
+    return {key: delta for key, delta in deltas.items() if delta[0] or delta[1]}
+
+def apply_deltas(connection, deltas: dict) -> None:
+    table = ReservationDailyRollup.__table__
+    for (day, group_id, cleaning_type, priority, approved), (count, revenue) in sorted(deltas.items()):
+        stmt = pg_insert(table).values(
+            day=day,
+            assigned_group_id=group_id,
+            cleaning_type=cleaning_type,
+            priority=priority,
+            approved=approved,
+            reservation_count=count,
+            revenue=revenue
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.assigned_group_id, table.c.cleaning_type, table.c.priority, table.c.approved],
+            set_={
+                "reservation_count": table.c.reservation_count + stmt.excluded.reservation_count,
+                "revenue": table.c.revenue + stmt.excluded.revenue,
+            }
+        )
+        connection.execute(stmt)
+
+@event.listens_for(Session, "after_flush")
+def _maintain_rollups(session, flush_context):
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def rebuild_rollups(connection) -> int:
+    """Recompute every rollup row from `reservations`; returns the row count."""
+    table = ReservationDailyRollup.__table__
+    day = cast(Reservation.cleaning_date, Date)
+    # Inlined literals keep the SELECT and GROUP BY expressions identical.
+    group_id = func.coalesce(Reservation.assigned_group_id, literal_column("0"))
+    cleaning_type = func.coalesce(Reservation.cleaning_type, literal_column("''"))
+    priority = func.coalesce(cast(Reservation.priority, String), literal_column("''"))
+    approved = func.coalesce(Reservation.approved_by_admin, false())
+
+    source = (
+        select(
+            day,
+            group_id,
+            cleaning_type,
+            priority,
+            approved,
+            func.count(Reservation.id),
+            func.coalesce(func.sum(Reservation.price), literal_column("0"))
+        )
+        .where(Reservation.cleaning_date.isnot(None))
+        .group_by(day, group_id, cleaning_type, priority, approved)
+    )
+
+    connection.execute(delete(table))
+    connection.execute(
+        insert(table).from_select(
+            ["day", "assigned_group_id", "cleaning_type", "priority", "approved", "reservation_count", "revenue"],
+            source
+        )
+    )
+    return connection.execute(select(func.count()).select_from(table)).scalar()
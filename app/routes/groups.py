@@ -1,73 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from app.models import Group, User
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas import (
     GroupCreate, 
     GroupResponse, 
-    GroupBase,
     RoleType,
-    SpecializationType
+    SpecializationType,
+    Page
 )
-from sqlalchemy.sql import func
+from app.pagination import paginate, ascending
+from app.responses import fast_list_response, rows_to_dicts
+from app.versioning import table_etag, not_modified
+from app.assignment import assignment_engine
+from app.ratings import RATING_MARKER
+from app.export import columnar_available, group_columnar_bytes, COLUMNAR_MEDIA_TYPES
 
 router = APIRouter(
     prefix="/groups",
     tags=["groups"]
 )
 
-@router.get("/", response_model=List[GroupResponse])
-def list_groups(
-    skip: int = Query(default=0, ge=0),
-    limit: int = Query(default=100, le=100),
+@router.get("/", response_model=Page[GroupResponse])
+async def list_groups(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=100),
     specialization: Optional[SpecializationType] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Group)
+    query = select(Group)
     if specialization:
-        query = query.filter(Group.specialization == specialization)
-    groups = query.offset(skip).limit(limit).all()
-    return groups
+        query = query.where(Group.specialization == specialization)
+    return await paginate(db, query, [ascending(Group.id)], cursor, limit)
 
 @router.get("/all", response_model=List[GroupResponse])
 async def get_all_groups(
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    fast: bool = Query(default=False, description="Skip response validation and encode rows with orjson"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    groups = db.query(Group).all()
-    
-    response_groups = []
-    for group in groups:
-        group_dict = {
-            "id": group.id,
-            "name": group.name,
-            "specialization": group.specialization,
-            "rating": group.rating,
-            "chief_id": group.chief_id,
-            "member_ids": [member.id for member in group.members]  # Extract just the IDs
-        }
-        response_groups.append(group_dict)
+    etag = await table_etag(db, request, "groups", "group_members", markers=RATING_MARKER)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    result = await db.execute(
+        select(
+            Group.id,
+            Group.name,
+            Group.specialization,
+            Group.rating,
+            Group.chief_id,
+            Group.member_ids
+        )
+        .order_by(Group.id)
+    )
+    response_groups = rows_to_dicts(result.all())
     
+    if fast:
+        return fast_list_response(response_groups, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return response_groups
 
+@router.get("/export")
+async def export_groups(
+    request: Request,
+    format: str = Query(default="arrow", enum=["arrow", "parquet"]),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not columnar_available():
+        raise HTTPException(status_code=501, detail="pyarrow is not installed on this server")
+    etag = await table_etag(db, request, "groups", "group_members", markers=RATING_MARKER)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    return Response(
+        content=await group_columnar_bytes(format),
+        media_type=COLUMNAR_MEDIA_TYPES[format],
+        headers={"ETag": etag}
+    )
+
 @router.get("/{group_id}", response_model=GroupResponse)
 async def get_group(
+    request: Request,
+    response: Response,
     group_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    group = db.query(Group).filter(Group.id == group_id).first()
+    etag = await table_etag(db, request, "groups", "group_members", markers=RATING_MARKER)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    group = await db.get(Group, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
+    response.headers["ETag"] = etag
     return group
 
 @router.post("/", response_model=GroupResponse)
-def create_group(
+async def create_group(
     group: GroupCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        if db.query(Group).filter(Group.name == group.name).first():
+        if await db.scalar(select(Group.id).where(Group.name == group.name)):
             raise HTTPException(
                 status_code=400,
                 detail="Group with this name already exists"
@@ -75,10 +117,10 @@ def create_group(
 
         chief = None
         if group.chief_id:
-            chief = db.query(User).filter(
+            chief = await db.scalar(select(User).where(
                 User.id == group.chief_id,
                 User.role == RoleType.CHIEF
-            ).first()
+            ))
             if not chief:
                 raise HTTPException(
                     status_code=400,
@@ -91,10 +133,10 @@ def create_group(
                 detail="A group cannot have more than 5 members"
             )
 
-        members = db.query(User).filter(
+        members = (await db.scalars(select(User).where(
             User.id.in_(group.member_ids),
             User.role == RoleType.MEMBER
-        ).all()
+        ))).all()
         if len(members) != len(group.member_ids):
             raise HTTPException(
                 status_code=400,
@@ -104,46 +146,50 @@ def create_group(
         new_group = Group(
             name=group.name,
             specialization=group.specialization,
-            chief_id=chief.id if chief else None,
-            rating=group.rating
+            chief_id=chief.id if chief else None
         )
         new_group.members = members
         
         db.add(new_group)
-        db.commit()
-        db.refresh(new_group)
+        await db.commit()
+        assignment_engine.invalidate(new_group.specialization)
+        await db.refresh(new_group)
         return new_group
 
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Database integrity error occurred"
         )
 
 @router.put("/{group_id}", response_model=GroupResponse)
-def update_group(
+async def update_group(
     group_id: int = Path(..., gt=0),
     group: GroupCreate = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    existing_group = db.query(Group).filter(Group.id == group_id).first()
+    existing_group = await db.scalar(
+        select(Group)
+        .options(selectinload(Group.members))
+        .where(Group.id == group_id)
+    )
     if not existing_group:
         raise HTTPException(status_code=404, detail="Group not found")
 
     try:
         if group.name != existing_group.name:
-            if db.query(Group).filter(Group.name == group.name).first():
+            if await db.scalar(select(Group.id).where(Group.name == group.name)):
                 raise HTTPException(
                     status_code=400,
                     detail="Group with this name already exists"
                 )
 
         if group.chief_id:
-            chief = db.query(User).filter(
+            chief = await db.scalar(select(User).where(
                 User.id == group.chief_id,
                 User.role == RoleType.CHIEF
-            ).first()
+            ))
             if not chief:
                 raise HTTPException(
                     status_code=400,
@@ -157,54 +203,51 @@ def update_group(
                 detail="A group cannot have more than 5 members"
             )
 
-        members = db.query(User).filter(
+        members = (await db.scalars(select(User).where(
             User.id.in_(group.member_ids),
             User.role == RoleType.MEMBER
-        ).all()
+        ))).all()
         if len(members) != len(group.member_ids):
             raise HTTPException(
                 status_code=400,
                 detail="Some members not found or invalid role"
             )
         
+        previous_specialization = existing_group.specialization
         existing_group.members = members
         existing_group.name = group.name
         existing_group.specialization = group.specialization
-        existing_group.rating = group.rating
 
-        db.commit()
-        db.refresh(existing_group)
+        await db.commit()
+        assignment_engine.invalidate(previous_specialization)
+        assignment_engine.invalidate(existing_group.specialization)
+        await db.refresh(existing_group)
         return existing_group
 
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Database integrity error occurred"
         )
 
 @router.delete("/{group_id}")
-def delete_group(
+async def delete_group(
     group_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    group = db.query(Group).filter(Group.id == group_id).first()
+    group = await db.get(Group, group_id)
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
 
     try:
-        db.delete(group)
-        db.commit()
+        await db.delete(group)
+        await db.commit()
+        assignment_engine.invalidate(group.specialization)
         return {"message": "Group deleted successfully"}
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Cannot delete group due to existing references"
         )
-@router.get("/list", response_model=List[GroupResponse])
-async def get_all_groups(
-    db: Session = Depends(get_db)
-):
-    groups = db.query(Group).all()
-    return groups
@@ -1,20 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict, Any
-from fastapi import Query
 import logging
-from datetime import date, datetime, timedelta
-from app.database import get_db
-from app.models import Reservation, Group, User, SpecializationType, RoleType
+from datetime import date
+from app.database import get_async_db
+from app.models import Reservation, User, RoleType
 from app.schemas import (
     ReservationCreate,
     ReservationResponse,
-    ReservationUpdate,
-    PriorityType
+    Page
 )
 from app.dependencies import get_current_user
+from app.assignment import assignment_engine
+from app.ratings import record_rating
+from app.statistics import reservation_statistics
+from app.dashboard import get_snapshot
+from app.visibility import visible_group_ids
+from app.pagination import paginate, ascending
+from app.responses import fast_page_response, rows_to_dicts
+from app.versioning import table_etag, not_modified
+from app.export import (
+    reservation_export_stmt,
+    ndjson_chunks,
+    csv_chunks,
+    columnar_available,
+    reservation_columnar_chunks,
+    COLUMNAR_MEDIA_TYPES
+)
 from fastapi.templating import Jinja2Templates
 
 router = APIRouter(
@@ -39,18 +54,20 @@ def check_user_role(user: User, allowed_roles: List[str]):
 async def create_reservation(
     reservation: ReservationCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.CLIENT])
 
-    assigned_group = (
-        db.query(Group)
-        .filter(Group.specialization == reservation.cleaning_type)
-        .order_by(Group.rating.desc())
-        .first()
+    assigned_group_id = await assignment_engine.assign(
+        db, reservation.cleaning_type, reservation.cleaning_date
     )
 
-    if not assigned_group:
+    if assigned_group_id is None:
+        if await assignment_engine.has_candidates(db, reservation.cleaning_type):
+            raise HTTPException(
+                status_code=400,
+                detail=f"No group with spare capacity for {reservation.cleaning_type.value} on {reservation.cleaning_date}"
+            )
         raise HTTPException(
             status_code=400,
             detail=f"No group available for {reservation.cleaning_type}"
@@ -58,7 +75,7 @@ async def create_reservation(
 
     new_reservation = Reservation(
         client_id=current_user.id,
-        assigned_group_id=assigned_group.id,
+        assigned_group_id=assigned_group_id,
         cleaning_type=reservation.cleaning_type,
         address=reservation.address,
         house_number=reservation.house_number,
@@ -68,27 +85,35 @@ async def create_reservation(
     )
 
     db.add(new_reservation)
-    db.commit()
-    db.refresh(new_reservation)
+    try:
+        await db.commit()
+    except BaseException:
+        # BaseException: a cancelled request must give its slot back too.
+        assignment_engine.release(reservation.cleaning_type, reservation.cleaning_date, assigned_group_id)
+        raise
+    assignment_engine.confirm(reservation.cleaning_type, reservation.cleaning_date, assigned_group_id)
+    await db.refresh(new_reservation)
     return new_reservation
 
 
 """Get all reservations for the current client"""
 
-@router.get("/dashboard/client", response_model=List[ReservationResponse])
+@router.get("/dashboard/client", response_model=Page[ReservationResponse])
 async def client_dashboard(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.CLIENT])
     
-    reservations = (
-        db.query(Reservation)
-        .filter(Reservation.client_id == current_user.id)
-        .order_by(Reservation.cleaning_date)
-        .all()
+    return await paginate(
+        db,
+        select(Reservation).where(Reservation.client_id == current_user.id),
+        [ascending(Reservation.cleaning_date), ascending(Reservation.id)],
+        cursor,
+        limit
     )
-    return reservations
 
 
 """Get admin dashboard with statistics"""
@@ -96,71 +121,95 @@ async def client_dashboard(
 @router.get("/dashboard/admin", response_class=HTMLResponse)
 async def admin_dashboard(
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     check_user_role(current_user, [RoleType.ADMIN])
 
-    total_groups = db.query(func.count(Group.id)).scalar()
-    total_members = db.query(func.count(User.id)).filter(User.role == RoleType.MEMBER).scalar()
-    total_reservations = db.query(func.count(Reservation.id)).scalar()
-    total_clients = db.query(func.count(User.id)).filter(User.role == RoleType.CLIENT).scalar()
-
-    recent_reservations = (
-        db.query(Reservation)
-        .order_by(Reservation.reservation_date.desc())
-        .limit(10)
-        .all()
-    )
-
-    monthly_stats = (
-        db.query(
-            extract('month', Reservation.cleaning_date).label('month'),
-            func.count(Reservation.id).label('count')
-        )
-        .group_by(extract('month', Reservation.cleaning_date))
-        .all()
-    )
-
-    top_groups = (
-        db.query(Group)
-        .order_by(Group.rating.desc())
-        .limit(5)
-        .all()
-    )
-
+    snapshot = await get_snapshot()
     context = {
         "request": request,
-        "total_groups": total_groups,
-        "total_members": total_members,
-        "total_reservations": total_reservations,
-        "total_clients": total_clients,
-        "recent_reservations": recent_reservations,
-        "monthly_stats": monthly_stats,
-        "top_groups": top_groups
+        **snapshot.data,
+        "refreshed_at": snapshot.refreshed_at,
+        "snapshot_age_seconds": int(snapshot.age_seconds)
     }
 
-    return templates.TemplateResponse("dashboard/admin_dashboard.html", context)
+    return templates.TemplateResponse(
+        request,
+        "dashboard/admin_dashboard.html",
+        context,
+        headers={"X-Snapshot-Age": str(int(snapshot.age_seconds))}
+    )
 
 
 
 """Get all reservations assigned to the chief's group"""
 
-@router.get("/dashboard/chief")
+@router.get("/dashboard/chief", response_model=Page[ReservationResponse])
 async def chief_dashboard(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.CHIEF])
     
-    reservations = (
-        db.query(Reservation)
-        .join(Group)
-        .filter(Group.chief_id == current_user.id)
-        .order_by(Reservation.cleaning_date)
-        .all()
+    return await paginate(
+        db,
+        select(Reservation).where(
+            Reservation.assigned_group_id.in_(await visible_group_ids(db, current_user))
+        ),
+        [ascending(Reservation.cleaning_date), ascending(Reservation.id)],
+        cursor,
+        limit
     )
-    return reservations
+
+
+
+"""Get comprehensive statistics about reservations"""
+
+@router.get("/statistics", response_model=Dict[str, Any])
+async def get_reservation_statistics(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    source: str = Query("rollup", enum=["rollup", "raw"]),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await reservation_statistics(db, start_date, end_date, source)
+
+
+
+"""Stream every reservation as NDJSON, CSV, Arrow IPC or Parquet straight from a server-side cursor"""
+
+@router.get("/export")
+async def export_reservations(
+    request: Request,
+    format: str = Query(default="ndjson", enum=["ndjson", "csv", "arrow", "parquet"]),
+    db: AsyncSession = Depends(get_async_db)
+):
+    etag = await table_etag(db, request, "reservations")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    headers = {"ETag": etag}
+
+    if format in COLUMNAR_MEDIA_TYPES:
+        if not columnar_available():
+            raise HTTPException(status_code=501, detail="pyarrow is not installed on this server")
+        return StreamingResponse(
+            reservation_columnar_chunks(format),
+            media_type=COLUMNAR_MEDIA_TYPES[format],
+            headers=headers
+        )
+
+    stmt = reservation_export_stmt()
+    if format == "csv":
+        return StreamingResponse(
+            csv_chunks(stmt),
+            media_type="text/csv",
+            headers={**headers, "Content-Disposition": 'attachment; filename="reservations.csv"'}
+        )
+    return StreamingResponse(ndjson_chunks(stmt), media_type="application/x-ndjson", headers=headers)
 
 
 
@@ -170,9 +219,9 @@ async def chief_dashboard(
 async def reservation_detail(
     reservation_id: int = Path(..., gt=0),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    reservation = await db.get(Reservation, reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
     
@@ -189,16 +238,16 @@ async def reservation_detail(
 async def approve_reservation(
     reservation_id: int = Path(..., gt=0),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.ADMIN])
     
-    reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    reservation = await db.get(Reservation, reservation_id)
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
     
     reservation.approved_by_admin = True
-    db.commit()
+    await db.commit()
     return {"message": "Reservation approved successfully"}
 
 
@@ -210,36 +259,51 @@ async def rate_group(
     reservation_id: int,
     rating: int = Query(..., ge=1, le=5),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.CLIENT])
     
-    reservation = (
-        db.query(Reservation)
-        .filter(
+    result = await db.execute(
+        select(Reservation)
+        .where(
             Reservation.id == reservation_id,
             Reservation.client_id == current_user.id
         )
-        .first()
     )
+    reservation = result.scalars().first()
     
     if not reservation:
         raise HTTPException(status_code=404, detail="Reservation not found")
     
-    group = reservation.assigned_group
-    group.rating = (group.rating + rating) / 2
-    db.commit()
+    if reservation.assigned_group_id is None:
+        raise HTTPException(status_code=400, detail="Reservation has no assigned group")
+    
+    try:
+        await record_rating(db, reservation, current_user.id, rating)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Reservation already rated")
     
     return {"message": "Rating submitted successfully"}
 
 
 
-"""Retrieve all reservations without authentication, limited to 50 rows at a time."""
+"""Retrieve all reservations without authentication, one keyset page at a time."""
 
-@router.get("", response_model=List[ReservationResponse])
+@router.get("", response_model=Page[ReservationResponse])
 async def get_all_reservations(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=1000, ge=1, le=10000),
+    fast: bool = Query(default=False, description="Skip response validation and encode rows with orjson"),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    etag = await table_etag(db, request, "reservations")
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     stmt = (
         select(
             Reservation.id,
@@ -254,106 +318,17 @@ async def get_all_reservations(
             Reservation.approved_by_client,
             Reservation.approved_by_admin
         )
-        .limit(500000)
     )
     
-    result = db.execute(stmt)
-    reservations = result.all()
-    
-    # print(reservations)
+    page = await paginate(db, stmt, [ascending(Reservation.id)], cursor, limit, scalars=False)
     
     try:
-        return [
-            {
-                "id": r.id,
-                "cleaning_type": r.cleaning_type,
-                "address": r.address,
-                "house_number": r.house_number,
-                "cleaning_date": r.cleaning_date,
-                "price": r.price,
-                "approved_by_client": r.approved_by_client,
-                "approved_by_admin": r.approved_by_admin,
-                "priority": r.priority.value,
-                "client_id": r.client_id,
-                "assigned_group_id": r.assigned_group_id
-            }
-            for r in reservations
-        ]
+        if fast:
+            # Rows already match ReservationResponse; skip per-row validation
+            # and encode them directly.
+            return fast_page_response(page["items"], page["next_cursor"], headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return {"items": rows_to_dicts(page["items"]), "next_cursor": page["next_cursor"]}
     except Exception as e:
         logging.error(f"Error processing reservations: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Error fetching reservations")
-
-
-
-"""Get comprehensive statistics about reservations"""
-
-@router.get("/statistics", response_model=Dict[str, Any])
-async def get_reservation_statistics(
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    query = db.query(Reservation)
-    
-    if start_date:
-        query = query.filter(Reservation.cleaning_date >= start_date)
-    if end_date:
-        query = query.filter(Reservation.cleaning_date <= end_date)
-    
-    total_count = query.count()
-    total_revenue = db.query(func.sum(Reservation.price)).scalar() or 0
-    
-    pending_count = query.filter(Reservation.approved_by_admin == False).count()
-    approved_count = query.filter(Reservation.approved_by_admin == True).count()
-    
-    priority_stats = (
-        query.with_entities(
-            Reservation.priority,
-            func.count(Reservation.id)
-        )
-        .group_by(Reservation.priority)
-        .all()
-    )
-    
-    cleaning_type_stats = (
-        query.with_entities(
-            Reservation.cleaning_type,
-            func.count(Reservation.id)
-        )
-        .group_by(Reservation.cleaning_type)
-        .all()
-    )
-    
-    monthly_stats = (
-        query.with_entities(
-            func.strftime('%Y-%m', Reservation.cleaning_date),
-            func.count(Reservation.id),
-            func.sum(Reservation.price)
-        )
-        .group_by(func.strftime('%Y-%m', Reservation.cleaning_date))
-        .all()
-    )
-    
-    return {
-        "total_reservations": total_count,
-        "total_revenue": float(total_revenue),
-        "status_breakdown": {
-            "pending": pending_count,
-            "approved": approved_count
-        },
-        "priority_breakdown": {
-            priority: count for priority, count in priority_stats
-        },
-        "cleaning_type_breakdown": {
-            c_type: count for c_type, count in cleaning_type_stats
-        },
-        "monthly_breakdown": [
-            {
-                "month": month,
-                "count": count,
-                "revenue": float(revenue or 0)
-            }
-            for month, count, revenue in monthly_stats
-        ]
-    }
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Query, Path
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Date, cast, func, select
 from typing import List, Optional
-from datetime import date, datetime
-from app.database import get_db
-from app.models import Reservation, Group, User, SpecializationType, RoleType
+from datetime import date, datetime, timedelta
+from app.database import get_async_db
+from app.models import Reservation, Group, GroupTaskCounter, User, RoleType, TaskStatus
 from app.schemas import (
-    ReservationResponse,
     TaskListResponse,
-    TaskStatusUpdate
+    TaskStatusUpdate,
+    Page
 )
 from app.dependencies import get_current_user
+from app.pagination import paginate, ascending, descending
+from app.task_status import can_transition, status_counts
+from app.visibility import visible_group_ids, visible_tasks
 from fastapi.templating import Jinja2Templates
 
 router = APIRouter(
@@ -27,43 +29,53 @@ def check_user_role(user: User, allowed_roles: List[str]):
             status_code=403,
             detail=f"Access denied. Required roles: {', '.join(allowed_roles)}"
         )
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+def _calendar_range(month: Optional[int], year: Optional[int]):
+    """Half-open [start, end) datetimes for a month or a whole year."""
+    if month:
+        start = datetime(year, month, 1)
+        end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    else:
+        start, end = datetime(year, 1, 1), datetime(year + 1, 1, 1)
+    return start, end
         
         
 """Get list of tasks based on user role and filters"""
 
-@router.get("/list", response_model=List[TaskListResponse])
+@router.get("/list", response_model=Page[TaskListResponse])
 async def task_list(
-    status: Optional[str] = Query(None, enum=["pending", "in_progress", "completed"]),
+    status: Optional[TaskStatus] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Reservation)
-
-    if current_user.role == RoleType.CHIEF:
-        query = query.filter(Reservation.assigned_group.has(chief_id=current_user.id))
-    elif current_user.role == RoleType.MEMBER:
-        query = query.filter(Reservation.assigned_group_id.in_(
-            db.query(Group.id).filter(Group.members.any(id=current_user.id))
-        ))
-    elif current_user.role == RoleType.CLIENT:
-        query = query.filter(Reservation.client_id == current_user.id)
+    query = await visible_tasks(db, select(Reservation), current_user)
     
     if status:
-        query = query.filter(Reservation.status == status)
+        query = query.where(Reservation.status == status)
     
     if date_from:
-        query = query.filter(Reservation.cleaning_date >= date_from)
+        query = query.where(Reservation.cleaning_date >= _day_start(date_from))
     if date_to:
-        query = query.filter(Reservation.cleaning_date <= date_to)
-    
-    tasks = query.order_by(
-        Reservation.priority.desc(),
-        Reservation.cleaning_date
-    ).all()
-    
-    return tasks
+        query = query.where(Reservation.cleaning_date < _day_start(date_to + timedelta(days=1)))
+    
+    return await paginate(
+        db,
+        query,
+        [
+            descending(Reservation.priority),
+            ascending(Reservation.cleaning_date),
+            ascending(Reservation.id)
+        ],
+        cursor,
+        limit
+    )
 
 
 """Update task status (Chief only)"""
@@ -73,28 +85,38 @@ async def update_task_status(
     task_id: int = Path(..., gt=0),
     status_update: TaskStatusUpdate = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.CHIEF])
     
-    task = (
-        db.query(Reservation)
-        .filter(
+    # Row lock so concurrent transitions of the same task are serialized and
+    # each one sees the status the previous one left behind.
+    result = await db.execute(
+        select(Reservation)
+        .where(
             Reservation.id == task_id,
-            Reservation.assigned_group.has(chief_id=current_user.id)
+            Reservation.assigned_group_id.in_(await visible_group_ids(db, current_user))
         )
-        .first()
+        .with_for_update()
     )
+    task = result.scalars().first()
     
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task.status = status_update.status
+    new_status = TaskStatus(status_update.status.value)
+    if not can_transition(task.status, new_status):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot change task status from {task.status.value} to {new_status.value}"
+        )
+    
+    task.status = new_status
     if status_update.notes:
         task.notes = status_update.notes
     
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
     return task
 
 
@@ -103,19 +125,19 @@ async def update_task_status(
 @router.get("/statistics")
 async def task_statistics(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.CHIEF, RoleType.ADMIN])
     
-    query = db.query(Reservation)
-    
-    if current_user.role == RoleType.CHIEF:
-        query = query.filter(Reservation.assigned_group.has(chief_id=current_user.id))
+    counts = await status_counts(
+        db,
+        group_ids=await visible_group_ids(db, current_user) if current_user.role == RoleType.CHIEF else None
+    )
     
-    total_tasks = query.count()
-    completed_tasks = query.filter(Reservation.status == "completed").count()
-    pending_tasks = query.filter(Reservation.status == "pending").count()
-    in_progress_tasks = query.filter(Reservation.status == "in_progress").count()
+    total_tasks = sum(counts.values())
+    completed_tasks = counts[TaskStatus.COMPLETED]
+    pending_tasks = counts[TaskStatus.PENDING]
+    in_progress_tasks = counts[TaskStatus.IN_PROGRESS]
     
     completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
     
@@ -128,74 +150,104 @@ async def task_statistics(
     }
     
 
-"""Get calendar view of tasks"""
+"""Get calendar view of tasks
+
+mode=summary returns the task count per day; the tasks of a single day are
+then fetched from /tasks/calendar/{day}.
+"""
 
 @router.get("/calendar")
 async def task_calendar(
     month: Optional[int] = Query(None, ge=1, le=12),
     year: Optional[int] = Query(None, ge=2000),
+    mode: str = Query("detail", enum=["detail", "summary"]),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Reservation)
-    
-    if current_user.role == RoleType.CHIEF:
-        query = query.filter(Reservation.assigned_group.has(chief_id=current_user.id))
-    elif current_user.role == RoleType.MEMBER:
-        query = query.filter(Reservation.assigned_group_id.in_(
-            db.query(Group.id).filter(Group.members.any(id=current_user.id))
-        ))
-    elif current_user.role == RoleType.CLIENT:
-        query = query.filter(Reservation.client_id == current_user.id)
-    
-    if month and year:
-        query = query.filter(
-            func.extract('month', Reservation.cleaning_date) == month,
-            func.extract('year', Reservation.cleaning_date) == year
+    if month and not year:
+        raise HTTPException(status_code=400, detail="year is required when month is given")
+    
+    filters = []
+    if year:
+        start, end = _calendar_range(month, year)
+        filters = [Reservation.cleaning_date >= start, Reservation.cleaning_date < end]
+    
+    if mode == "summary":
+        day = cast(Reservation.cleaning_date, Date)
+        result = await db.execute(
+            (await visible_tasks(db, select(day.label("day"), func.count(Reservation.id)), current_user))
+            .where(*filters)
+            .group_by(day)
+            .order_by(day)
         )
+        return {task_day.isoformat(): count for task_day, count in result.all()}
     
-    tasks = query.order_by(Reservation.cleaning_date).all()
+    result = await db.execute(
+        (await visible_tasks(db, select(Reservation), current_user))
+        .where(*filters)
+        .order_by(Reservation.cleaning_date, Reservation.id)
+    )
     
     calendar_data = {}
-    for task in tasks:
+    for task in result.scalars().all():
         date_str = task.cleaning_date.strftime('%Y-%m-%d')
-        if date_str not in calendar_data:
-            calendar_data[date_str] = []
-        calendar_data[date_str].append(task)
+        calendar_data.setdefault(date_str, []).append(TaskListResponse.model_validate(task))
     
     return calendar_data
 
 
+"""Get the tasks of a single calendar day"""
+
+@router.get("/calendar/{day}", response_model=List[TaskListResponse])
+async def task_calendar_day(
+    day: date,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(
+        (await visible_tasks(db, select(Reservation), current_user))
+        .where(
+            Reservation.cleaning_date >= _day_start(day),
+            Reservation.cleaning_date < _day_start(day + timedelta(days=1))
+        )
+        .order_by(Reservation.cleaning_date, Reservation.id)
+    )
+    return result.scalars().all()
+
+
 
 """Get workload statistics for groups (Admin/Chief only)"""
 
 @router.get("/workload")
 async def group_workload(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     check_user_role(current_user, [RoleType.ADMIN, RoleType.CHIEF])
     
     query = (
-        db.query(
+        select(
             Group.name,
-            func.count(Reservation.id).label('total_tasks'),
-            func.count(case([(Reservation.status == 'completed', 1)])).label('completed_tasks')
+            func.coalesce(func.sum(GroupTaskCounter.task_count), 0).label('total_tasks'),
+            func.coalesce(
+                func.sum(GroupTaskCounter.task_count).filter(GroupTaskCounter.status == TaskStatus.COMPLETED.name),
+                0
+            ).label('completed_tasks')
         )
-        .outerjoin(Reservation)
+        .outerjoin(GroupTaskCounter, GroupTaskCounter.group_id == Group.id)
         .group_by(Group.id)
     )
     
     if current_user.role == RoleType.CHIEF:
-        query = query.filter(Group.chief_id == current_user.id)
+        query = query.where(Group.chief_id == current_user.id)
     
-    workload_stats = query.all()
+    workload_stats = (await db.execute(query)).all()
     
     return [
         {
             "group_name": stats.name,
-            "total_tasks": stats.total_tasks,
-            "completed_tasks": stats.completed_tasks,
+            "total_tasks": int(stats.total_tasks),
+            "completed_tasks": int(stats.completed_tasks),
             "completion_rate": round((stats.completed_tasks / stats.total_tasks * 100), 2) if stats.total_tasks > 0 else 0
         }
         for stats in workload_stats
@@ -1,23 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app import models, schemas
-from app.database import get_db
-from jose import JWTError, jwt
+from app.database import get_async_db
+from app.dependencies import get_current_user
+from app.passwords import hash_password, verify_password, PasswordHasherBusy
+from jose import jwt
 from datetime import datetime, timedelta
-from fastapi.security import OAuth2PasswordBearer
+from app.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-SECRET_KEY = "the-secret-key-for-hashing-passwords-with-your-passwords-in-your-password-and-jwt-secret"
-ALGORITHM = "HS256"
+SECRET_KEY = settings.SECRET_KEY
+ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
 router = APIRouter()
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -28,38 +26,53 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
+def hasher_busy():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
 
 """Sign up a user"""
 
 @router.post("/users/", response_model=schemas.UserBase)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(
+        select(models.User).where(models.User.username == user.username)
+    )).scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
+    try:
+        password_hash = await hash_password(user.password)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    
     db_user = models.User(
         username=user.username,
         email=user.email,
         role=user.role,
-        password_hash=get_password_hash(user.password)
+        password_hash=password_hash
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 """Login function"""
 
 @router.post("/token")
-def login_for_access_token(form_data: schemas.UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.username == form_data.username).first()
+async def login_for_access_token(form_data: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(
+        select(models.User).where(models.User.username == form_data.username)
+    )).scalars().first()
     
-    if db_user is None or not verify_password(form_data.password, db_user.password_hash):
+    try:
+        valid = db_user is not None and await verify_password(form_data.password, db_user.password_hash)
+    except PasswordHasherBusy:
+        raise hasher_busy()
+    
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -70,24 +83,10 @@ def login_for_access_token(form_data: schemas.UserLogin, db: Session = Depends(g
 
 
 @router.post("/logout")
-def logout():
+async def logout():
     return {"message": "Logged out successfully. Token should be cleared client-side."}
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
-    except JWTError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
-
 
 @router.get("/users/me", response_model=schemas.UserBase)
-def read_users_me(current_user: models.User = Depends(get_current_user)):
+async def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
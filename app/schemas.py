@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Generic, TypeVar
 from datetime import date, datetime
 from enum import Enum
 from pydantic_settings import BaseSettings
@@ -15,6 +15,11 @@ class PriorityType(str, Enum):
     MEDIUM = "Medium"
     LOW = "Low"
 
+class TaskStatus(str, Enum):
+    PENDING = "pending"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+
 class SpecializationType(str, Enum):
     SALON = "Salon Cleaning"
     KITCHEN = "Kitchen Cleaning"
@@ -45,10 +50,11 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+# rating is not accepted from clients: app.ratings keeps it equal to
+# rating_sum / rating_count.
 class GroupBase(BaseModel):
     name: str
     specialization: SpecializationType
-    rating: Optional[float] = 0.0
 
 class GroupCreate(GroupBase):
     chief_id: Optional[int] = None
@@ -92,6 +98,12 @@ class ReservationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 class ReservationUpdate(BaseModel):
     approved_by_client: Optional[bool] = None
     approved_by_admin: Optional[bool] = None
@@ -115,7 +127,7 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
 class TaskStatusUpdate(BaseModel):
-    status: str
+    status: TaskStatus
     notes: Optional[str] = None
 
 class TaskListResponse(BaseModel):
@@ -123,8 +135,8 @@ class TaskListResponse(BaseModel):
     cleaning_type: SpecializationType
     address: str
     house_number: str
-    cleaning_date: date
-    status: str
+    cleaning_date: datetime
+    status: TaskStatus
     priority: PriorityType
     client_id: int
     assigned_group_id: Optional[int] = None
@@ -0,0 +1,169 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import func, literal, literal_column, null, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PriorityType, Reservation, ReservationDailyRollup
+
+"""Reservation statistics in a single aggregation pass.
+
+Totals, approval counts and the priority / cleaning type / month breakdowns
+are all computed by one statement: FILTER clauses for the conditional counts
+and GROUPING SETS for the breakdowns on PostgreSQL. Other dialects get the
+same result from one UNION ALL round trip.
+
+The statement runs either over the raw `reservations` rows or over the daily
+rollups (app.rollups), where its cost grows with the number of days in the
+range rather than the number of reservations.
+"""
+
+def month_bucket(column, dialect_name: str):
+    """'YYYY-MM' of a date/timestamp column; the format is inlined so the
+    SELECT and GROUP BY expressions compare equal on PostgreSQL."""
+    if dialect_name == "postgresql":
+        return func.to_char(column, literal_column("'YYYY-MM'"))
+    if dialect_name in ("mysql", "mariadb"):
+        return func.date_format(column, literal_column("'%Y-%m'"))
+    return func.strftime(literal_column("'%Y-%m'"), column)
+
+def _raw_measures():
+    return [
+        func.count(Reservation.id).label("count"),
+        func.sum(Reservation.price).label("revenue"),
+        func.count(Reservation.id).filter(Reservation.approved_by_admin == False).label("pending"),
+        func.count(Reservation.id).filter(Reservation.approved_by_admin == True).label("approved"),
+    ]
+
+def _rollup_measures():
+    rollup = ReservationDailyRollup
+    return [
+        func.sum(rollup.reservation_count).label("count"),
+        func.sum(rollup.revenue).label("revenue"),
+        func.sum(rollup.reservation_count).filter(rollup.approved == False).label("pending"),
+        func.sum(rollup.reservation_count).filter(rollup.approved == True).label("approved"),
+    ]
+
+def _grouping_sets_stmt(priority, cleaning_type, month, measures, filters):
+    return (
+        select(
+            func.grouping(priority).label("by_priority"),
+            func.grouping(cleaning_type).label("by_type"),
+            func.grouping(month).label("by_month"),
+            priority.label("priority"),
+            cleaning_type.label("cleaning_type"),
+            month.label("month"),
+            *measures
+        )
+        .where(*filters)
+        .group_by(func.grouping_sets(
+            tuple_(),
+            tuple_(priority),
+            tuple_(cleaning_type),
+            tuple_(month)
+        ))
+    )
+
+def _union_stmt(priority, cleaning_type, month, measures, filters):
+    """Same rows as GROUPING SETS; grouping() is 0 for a grouped column."""
+    def branch(grouped):
+        dimensions = {"priority": priority, "cleaning_type": cleaning_type, "month": month}
+        return (
+            select(
+                literal(0 if grouped == "priority" else 1).label("by_priority"),
+                literal(0 if grouped == "cleaning_type" else 1).label("by_type"),
+                literal(0 if grouped == "month" else 1).label("by_month"),
+                *[
+                    (expr if name == grouped else null()).label(name)
+                    for name, expr in dimensions.items()
+                ],
+                *measures
+            )
+            .where(*filters)
+            .group_by(*([dimensions[grouped]] if grouped else []))
+        )
+
+    return union_all(branch(None), branch("priority"), branch("cleaning_type"), branch("month"))
+
+def _priority_key(value):
+    """Raw rows carry PriorityType, rollups the enum name."""
+    if isinstance(value, str) and value in PriorityType.__members__:
+        return PriorityType[value]
+    return value or None
+
+async def reservation_statistics(
+    db: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    source: str = "rollup"
+) -> dict:
+    dialect_name = db.bind.dialect.name
+
+    if source == "rollup":
+        rollup = ReservationDailyRollup
+        priority, cleaning_type, day_column = rollup.priority, rollup.cleaning_type, rollup.day
+        measures = _rollup_measures()
+    else:
+        priority, cleaning_type, day_column = Reservation.priority, Reservation.cleaning_type, Reservation.cleaning_date
+        measures = _raw_measures()
+
+    # Half-open range on the bare column so an index on it can be used, and
+    # an end_date includes that whole day for timestamps too.
+    filters = []
+    if start_date:
+        filters.append(day_column >= start_date)
+    if end_date:
+        filters.append(day_column < end_date + timedelta(days=1))
+
+    month = month_bucket(day_column, dialect_name)
+    build = _grouping_sets_stmt if dialect_name == "postgresql" else _union_stmt
+    stmt = build(priority, cleaning_type, month, measures, filters)
+
+    totals = {"count": 0, "revenue": 0, "pending": 0, "approved": 0}
+    priority_breakdown = {}
+    cleaning_type_breakdown = {}
+    monthly_breakdown = []
+
+    for row in (await db.execute(stmt)).all():
+        count = int(row.count or 0)
+        if row.by_priority and row.by_type and row.by_month:
+            totals = {
+                "count": count,
+                "revenue": row.revenue,
+                "pending": int(row.pending or 0),
+                "approved": int(row.approved or 0)
+            }
+        elif not row.by_priority:
+            priority_breakdown[_priority_key(row.priority)] = count
+        elif not row.by_type:
+            cleaning_type_breakdown[row.cleaning_type or None] = count
+        else:
+            monthly_breakdown.append({
+                "month": row.month,
+                "count": count,
+                "revenue": float(row.revenue or 0)
+            })
+
+    monthly_breakdown.sort(key=lambda bucket: bucket["month"] or "")
+
+    return {
+        "total_reservations": totals["count"],
+        "total_revenue": float(totals["revenue"] or 0),
+        "status_breakdown": {
+            "pending": totals["pending"],
+            "approved": totals["approved"]
+        },
+        "priority_breakdown": priority_breakdown,
+        "cleaning_type_breakdown": cleaning_type_breakdown,
+        "monthly_breakdown": monthly_breakdown
+    }
+
+async def monthly_counts(db: AsyncSession) -> list:
+    """(month number, reservation count) over all years, from the rollups."""
+    month = func.extract("month", ReservationDailyRollup.day)
+    result = await db.execute(
+        select(month.label("month"), func.sum(ReservationDailyRollup.reservation_count).label("count"))
+        .group_by(month)
+        .order_by(month)
+    )
+    return [(int(row.month), int(row.count)) for row in result.all()]
@@ -0,0 +1,109 @@
+from collections import defaultdict
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import String, cast, delete, event, func, insert, inspect, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import GroupTaskCounter, Reservation, TaskStatus
+
+"""Task status state machine and per-group status counters.
+
+A reservation's `status` may only move along TASK_TRANSITIONS. Every ORM flush
+that creates, deletes or re-statuses a reservation (or moves it to another
+group) applies +/- deltas to `group_task_counters` in the same transaction,
+so task statistics and workload read a handful of counter rows instead of
+counting reservations.
+
+Bulk loads that bypass the ORM must be followed by `rebuild_status_counters`,
+e.g. `python -m app.Scripts.rebuild_task_counters`.
+"""
+
+TASK_TRANSITIONS = {
+    TaskStatus.PENDING: {TaskStatus.IN_PROGRESS},
+    TaskStatus.IN_PROGRESS: {TaskStatus.COMPLETED, TaskStatus.PENDING},
+    TaskStatus.COMPLETED: set(),
+}
+
+def can_transition(current: TaskStatus, new: TaskStatus) -> bool:
+    return new in TASK_TRANSITIONS.get(current, set())
+
+def _key(group_id, status):
+    if status is None:
+        return None
+    return (group_id or 0, getattr(status, "name", status))
+
+def _previous(obj, name):
+    history = inspect(obj).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, name)
+
+def collect_deltas(session: Session) -> dict:
+    deltas = defaultdict(int)
+
+    def add(key, count):
+        if key is not None:
+            deltas[key] += count
+
+    for obj in session.new:
+        if isinstance(obj, Reservation):
+            add(_key(obj.assigned_group_id, obj.status), 1)
+    for obj in session.deleted:
+        if isinstance(obj, Reservation):
+            add(_key(_previous(obj, "assigned_group_id"), _previous(obj, "status")), -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Reservation) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not (state.attrs.status.history.has_changes() or state.attrs.assigned_group_id.history.has_changes()):
+            continue
+        add(_key(_previous(obj, "assigned_group_id"), _previous(obj, "status")), -1)
+        add(_key(obj.assigned_group_id, obj.status), 1)
+
+    return {key: count for key, count in deltas.items() if count}
+
+def apply_deltas(connection, deltas: dict) -> None:
+    table = GroupTaskCounter.__table__
+    for (group_id, status), count in sorted(deltas.items()):
+        stmt = pg_insert(table).values(group_id=group_id, status=status, task_count=count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.group_id, table.c.status],
+            set_={"task_count": table.c.task_count + stmt.excluded.task_count}
+        )
+        connection.execute(stmt)
+
+@event.listens_for(Session, "after_flush")
+def _maintain_counters(session, flush_context):
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+def rebuild_status_counters(connection) -> int:
+    """Recompute every counter row from `reservations`; returns the row count."""
+    table = GroupTaskCounter.__table__
+    group_id = func.coalesce(Reservation.assigned_group_id, literal_column("0"))
+    status = cast(Reservation.status, String)
+
+    connection.execute(delete(table))
+    connection.execute(
+        insert(table).from_select(
+            ["group_id", "status", "task_count"],
+            select(group_id, status, func.count(Reservation.id)).group_by(group_id, status)
+        )
+    )
+    return connection.execute(select(func.count()).select_from(table)).scalar()
+
+async def status_counts(db: AsyncSession, group_ids: Optional[Sequence[int]] = None) -> Dict[TaskStatus, int]:
+    """Task count per status, over all groups or just `group_ids`."""
+    query = select(GroupTaskCounter.status, func.sum(GroupTaskCounter.task_count)).group_by(GroupTaskCounter.status)
+    if group_ids is not None:
+        query = query.where(GroupTaskCounter.group_id.in_(group_ids))
+    counts = {status: 0 for status in TaskStatus}
+    for status, count in (await db.execute(query)).all():
+        counts[TaskStatus[status]] = int(count or 0)
+    return counts
@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event, func, inspect, insert, literal, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.database import async_engine
+from app.models import TableChange
+
+"""Per-table versions and conditional GET support.
+
+Every ORM flush that inserts, updates or deletes rows appends one row per
+affected table (including many-to-many association tables whose collections
+changed) to `table_changes`, in the same transaction. A table's version is
+the sum of its rows' weights. Appending takes no lock that another writer
+could wait on; bumping a shared counter row instead would hold that row
+locked until commit and serialize every write to the table.
+
+Uncommitted rows are invisible, so a version only moves once the data behind
+it is committed, and read endpoints look the version up before the data:
+a client can get a new ETag with old data (and simply refetch later) but
+never an old ETag with new data. A background task folds each table's rows
+into a single row carrying their total weight every
+TABLE_CHANGES_COMPACT_INTERVAL_SECONDS, so the sum stays cheap to read and
+does not change.
+
+Read endpoints derive a strong ETag from the versions plus the request URL,
+so a request with a matching If-None-Match is answered with 304 without
+serializing anything. Only tables that back cached reads are versioned.
+Values that change too often to log every change, such as rating aggregates
+(see app.ratings), can be added to an ETag as `markers`: scalar expressions
+evaluated in the same query as the versions.
+
+Writes that bypass the ORM (bulk scripts, raw SQL) must call `bump_versions`
+themselves or clients keep their cached copies.
+"""
+
+ENCODING_SUFFIXES = ("-gzip", "-zstd")
+VERSIONED_TABLES = {"groups", "group_members", "reservations", "users"}
+
+# Only tables with more than one row are folded. A concurrent compaction waits
+# on the rows being deleted and then skips them, so no weight is counted twice;
+# rows committed while it runs are not in its snapshot and stay as they are.
+COMPACT_TABLE_CHANGES = text("""
+    WITH folded AS (
+        DELETE FROM table_changes
+        WHERE table_name IN (
+            SELECT table_name FROM table_changes
+            GROUP BY table_name
+            HAVING COUNT(*) > 1
+        )
+        RETURNING table_name, weight
+    )
+    INSERT INTO table_changes (table_name, weight)
+    SELECT table_name, SUM(weight) FROM folded GROUP BY table_name
+""")
+
+def _touched_tables(session: Session) -> set:
+    tables = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        state = inspect(obj)
+        mapper = state.mapper
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        tables.add(mapper.local_table.name)
+        for relationship in mapper.relationships:
+            if relationship.secondary is None:
+                continue
+            if obj in session.new or obj in session.deleted or state.attrs[relationship.key].history.has_changes():
+                tables.add(relationship.secondary.name)
+    return tables & VERSIONED_TABLES
+
+def bump_versions(connection, tables, weights: Optional[dict] = None) -> None:
+    """Advance each table's version by its weight in `weights` (default 1)."""
+    rows = [
+        {"table_name": table_name, "weight": (weights or {}).get(table_name, 1)}
+        for table_name in sorted(tables)
+    ]
+    if rows:
+        connection.execute(insert(TableChange.__table__), rows)
+
+def versions_stmt(tables):
+    return (
+        select(TableChange.table_name, func.sum(TableChange.weight))
+        .where(TableChange.table_name.in_(tables))
+        .group_by(TableChange.table_name)
+    )
+
+def read_versions(connection, tables) -> dict:
+    return {name: int(version) for name, version in connection.execute(versions_stmt(tables))}
+
+async def table_versions(db: AsyncSession, tables, markers: Optional[dict] = None) -> dict:
+    """Versions of `tables`, plus the current value of each of `markers` ({name: scalar expression})."""
+    stmt = versions_stmt(tables)
+    if markers:
+        stmt = union_all(stmt, *(
+            select(literal(name), func.coalesce(expression, 0)) for name, expression in markers.items()
+        ))
+    result = await db.execute(stmt)
+    return {name: int(version) for name, version in result.all()}
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_flush(session, flush_context):
+    tables = _touched_tables(session)
+    if tables:
+        bump_versions(session.connection(), tables)
+
+async def compact_changes() -> None:
+    async with async_engine.begin() as connection:
+        await connection.execute(COMPACT_TABLE_CHANGES)
+
+async def run_compactor(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await compact_changes()
+        except Exception as e:
+            logging.error(f"Error compacting table changes: {str(e)}", exc_info=True)
+
+
+async def table_etag(db: AsyncSession, request: Request, *tables: str, markers: Optional[dict] = None) -> str:
+    versions = await table_versions(db, tables, markers)
+    names = sorted(tables) + sorted(markers or {})
+    marker = ",".join(f"{name}:{versions.get(name, 0)}" for name in names)
+    digest = hashlib.sha1(f"{marker}|{request.url.path}?{request.url.query}".encode()).hexdigest()
+    return f'"{digest}"'
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def _normalize(tag: str) -> str:
+    tag = _strip_weak(tag)
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(f'{suffix}"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """A 304 response if the client's If-None-Match already matches `etag`.
+
+    The 304 repeats the tag that matched, encoding suffix included: it names
+    the representation the client has cached, which is what a 200 for the
+    same request would have carried. The compression middleware leaves 304s
+    alone.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    for tag in header.split(","):
+        tag = _strip_weak(tag)
+        if tag == "*":
+            return Response(status_code=304, headers={"ETag": etag})
+        if _normalize(tag) == etag:
+            return Response(status_code=304, headers={"ETag": tag})
+    return None
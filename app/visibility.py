@@ -0,0 +1,72 @@
+from typing import Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache import MISSING, TTLCache
+from app.config import settings
+from app.models import Group, Reservation, RoleType, User, group_members
+
+"""Which groups' tasks a user may see.
+
+A chief sees the tasks of the groups they lead and a member those of the
+groups they belong to. Both are resolved once into a tuple of group ids and
+cached per user, so task queries filter on a plain
+`assigned_group_id IN (...)` that the planner can answer from an index
+instead of a correlated EXISTS per row.
+
+Any committed flush that touches groups or memberships clears the cache in
+this process; changes made by other processes are picked up once an entry is
+older than VISIBILITY_CACHE_TTL_SECONDS.
+"""
+
+_group_ids = TTLCache(settings.VISIBILITY_CACHE_TTL_SECONDS)
+
+async def visible_group_ids(db: AsyncSession, user: User) -> Tuple[int, ...]:
+    key = (user.id, user.role)
+    group_ids = _group_ids.get(key)
+    if group_ids is not MISSING:
+        return group_ids
+
+    if user.role == RoleType.CHIEF:
+        query = select(Group.id).where(Group.chief_id == user.id)
+    else:
+        query = select(group_members.c.group_id).where(group_members.c.user_id == user.id)
+    group_ids = tuple(sorted((await db.scalars(query)).all()))
+    _group_ids.set(key, group_ids)
+    return group_ids
+
+async def visible_tasks(db: AsyncSession, query, user: User):
+    """Restrict a reservation query to the tasks `user` may see."""
+    if user.role in (RoleType.CHIEF, RoleType.MEMBER):
+        return query.where(Reservation.assigned_group_id.in_(await visible_group_ids(db, user)))
+    if user.role == RoleType.CLIENT:
+        return query.where(Reservation.client_id == user.id)
+    return query
+
+def invalidate(user_id=None) -> None:
+    if user_id is None:
+        _group_ids.invalidate()
+        return
+    for role in RoleType:
+        _group_ids.invalidate((user_id, role))
+
+
+@event.listens_for(Session, "after_flush")
+def _note_membership_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        if isinstance(obj, Group) or (isinstance(obj, User) and obj not in session.new):
+            session.info["visibility_changed"] = True
+            return
+
+@event.listens_for(Session, "after_commit")
+def _clear_on_commit(session):
+    if session.info.pop("visibility_changed", False):
+        invalidate()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop("visibility_changed", None)
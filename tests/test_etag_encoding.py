@@ -0,0 +1,60 @@
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from app.middleware import CompressionMiddleware
+from app.versioning import not_modified
+
+"""ETags across compression: the 304 for a compressed representation must
+carry the same validator as the 200 the client cached.
+
+Uses a stand-in route, so no database is needed.
+"""
+
+ETAG = '"0123456789abcdef"'
+BODY = b"x" * 4096
+
+def make_client() -> TestClient:
+    api = FastAPI()
+
+    @api.get("/items")
+    async def items(request: Request):
+        cached = not_modified(request, ETAG)
+        if cached:
+            return cached
+        return Response(BODY, media_type="text/plain", headers={"ETag": ETAG})
+
+    return TestClient(CompressionMiddleware(api))
+
+
+def test_304_repeats_the_encoded_etag():
+    client = make_client()
+    first = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"] == '"0123456789abcdef-gzip"'
+
+    second = client.get("/items", headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": first.headers["etag"],
+    })
+    assert second.status_code == 304
+    assert second.headers["etag"] == first.headers["etag"]
+
+
+def test_304_for_an_uncompressed_representation_keeps_the_bare_etag():
+    client = make_client()
+    first = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert first.headers["etag"] == ETAG
+
+    second = client.get("/items", headers={"Accept-Encoding": "gzip", "If-None-Match": ETAG})
+    assert second.status_code == 304
+    assert second.headers["etag"] == ETAG
+
+
+def test_changed_etag_is_not_a_match():
+    client = make_client()
+    response = client.get("/items", headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": '"fedcba9876543210-gzip"',
+    })
+    assert response.status_code == 200
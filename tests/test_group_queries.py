@@ -0,0 +1,116 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import delete, event, insert
+from sqlalchemy.exc import OperationalError
+
+from app.database import async_engine, engine
+
+try:
+    engine.connect().close()
+except OperationalError:
+    pytest.skip("needs the database in DATABASE_URL", allow_module_level=True)
+
+# app.main creates the tables on import, so it is imported only once the
+# database is known to be reachable.
+from app.main import app
+from app.models import Group, User, RoleType, SpecializationType, group_members
+from app.versioning import bump_versions
+
+"""Query-count regression test for the group read endpoints.
+
+Seeds N groups (a chief and two members each), counts the SQL statements
+every endpoint issues, seeds N more and counts again: member_ids is
+aggregated inside the group SELECT, so the counts must not grow with the
+number of groups. Needs
+the Postgres database in DATABASE_URL; everything it creates is removed
+afterwards.
+"""
+
+GROUPS_PER_BATCH = 20
+ENDPOINTS = ("/groups/all", "/groups/?limit=100", "/groups/{group_id}")
+
+
+@pytest.fixture
+def seed_groups():
+    prefix = f"query-count-{uuid.uuid4().hex[:8]}"
+    group_ids, user_ids = [], []
+
+    def seed(count: int) -> list:
+        start = len(group_ids)
+        with engine.begin() as connection:
+            users = connection.execute(insert(User).returning(User.id, sort_by_parameter_order=True), [
+                {
+                    "username": f"{prefix}-user{start * 3 + index}",
+                    "email": f"{prefix}-user{start * 3 + index}@example.com",
+                    "role": RoleType.CHIEF if index % 3 == 0 else RoleType.MEMBER,
+                }
+                for index in range(count * 3)
+            ]).scalars().all()
+            groups = connection.execute(insert(Group).returning(Group.id, sort_by_parameter_order=True), [
+                {
+                    "name": f"{prefix}-group{start + index}",
+                    "specialization": SpecializationType.GLASS,
+                    "chief_id": users[index * 3],
+                }
+                for index in range(count)
+            ]).scalars().all()
+            connection.execute(insert(group_members), [
+                {"group_id": group_id, "user_id": user_id}
+                for index, group_id in enumerate(groups)
+                for user_id in users[index * 3 + 1:index * 3 + 3]
+            ])
+            bump_versions(connection, {"users", "groups", "group_members"})
+        user_ids.extend(users)
+        group_ids.extend(groups)
+        return groups
+
+    yield seed
+
+    with engine.begin() as connection:
+        connection.execute(delete(group_members).where(group_members.c.group_id.in_(group_ids)))
+        connection.execute(delete(Group).where(Group.id.in_(group_ids)))
+        connection.execute(delete(User).where(User.id.in_(user_ids)))
+        bump_versions(connection, {"users", "groups", "group_members"})
+
+
+def statement_counts(group_id: int) -> dict:
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async def run() -> dict:
+        # ASGITransport does not run the lifespan, so no background task
+        # issues statements while the requests are being counted.
+        transport = httpx.ASGITransport(app=app)
+        counts = {}
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                for path in ENDPOINTS:
+                    statements.clear()
+                    response = await client.get(path.format(group_id=group_id))
+                    assert response.status_code == 200, response.text
+                    counts[path] = len(statements)
+        finally:
+            await async_engine.dispose()
+        return counts
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        return asyncio.run(run())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+def test_group_reads_do_not_issue_a_query_per_group(seed_groups):
+    first_group_id = seed_groups(GROUPS_PER_BATCH)[0]
+    with_n = statement_counts(first_group_id)
+
+    seed_groups(GROUPS_PER_BATCH)
+    with_2n = statement_counts(first_group_id)
+
+    assert with_2n == with_n
+    assert all(count <= 2 for count in with_n.values()), with_n